@@ -0,0 +1,174 @@
+import numpy as np
+
+import bitboard
+
+# Vectorized simulator: N boards are held as an (N, 4, 4) array of tile exponents (0 empty, 1 for 2, 2 for 4, ...)
+# and every step moves, spawns and checks game over for all of them with a few NumPy operations.
+# Moves reuse the row tables from bitboard.py: every board is turned so that its move becomes a left move,
+# the rows are packed into 16-bit indices, looked up and turned back.
+
+ROW_LEFT = np.array(bitboard.ROW_LEFT, dtype=np.uint16)
+SCORE_LEFT = np.array(bitboard.SCORE_LEFT, dtype=np.int64)
+NIBBLE_SHIFTS = np.array([0, 4, 8, 12], dtype=np.uint16)
+CELL_SHIFTS = np.arange(0, 64, 4, dtype=np.uint64)
+
+
+def _to_left(grids, direction):
+    # turn the boards so that `direction` becomes a left move
+    if direction == bitboard.RIGHT:
+        return grids[:, :, ::-1]
+    if direction == bitboard.UP:
+        return grids.transpose(0, 2, 1)
+    if direction == bitboard.DOWN:
+        return grids.transpose(0, 2, 1)[:, :, ::-1]
+    return grids
+
+
+def _from_left(grids, direction):
+    # inverse of _to_left
+    if direction == bitboard.RIGHT:
+        return grids[:, :, ::-1]
+    if direction == bitboard.UP:
+        return grids.transpose(0, 2, 1)
+    if direction == bitboard.DOWN:
+        return grids[:, :, ::-1].transpose(0, 2, 1)
+    return grids
+
+
+def boards_to_grids(boards):
+    # list of 64-bit bitboards -> (N, 4, 4) exponent array
+    boards = np.asarray(boards, dtype=np.uint64)
+    return ((boards[:, None] >> CELL_SHIFTS) & np.uint64(0xF)).astype(np.uint8).reshape(-1, 4, 4)
+
+
+def grids_to_boards(grids):
+    # (N, 4, 4) exponent array -> list of 64-bit bitboards
+    cells = grids.reshape(-1, 16).astype(np.uint64) << CELL_SHIFTS
+    return [int(board) for board in np.bitwise_or.reduce(cells, axis=1)]
+
+
+class BatchGame:
+    def __init__(self, n, rng=None):
+        # n fresh games with two random tiles each
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.grids = np.zeros((n, 4, 4), dtype=np.uint8)
+        self.score = np.zeros(n, dtype=np.int64)
+        everyone = np.ones(n, dtype=bool)
+        self.spawn(everyone)
+        self.spawn(everyone)
+        self.over = self.check_game_over()
+
+    @staticmethod
+    def from_boards(boards, scores=None, rng=None):
+        game = BatchGame(0, rng)
+        game.grids = boards_to_grids(boards)
+        game.score = np.zeros(len(game.grids), dtype=np.int64) if scores is None else np.array(scores, dtype=np.int64)
+        game.over = game.check_game_over()
+        return game
+
+    def __len__(self):
+        return len(self.grids)
+
+    def move(self, moves):
+        # slides every board in its own direction (0 - up, 1 - right, 2 - down, 3 - left),
+        # adds the merged values to the scores and returns a mask of the boards that changed
+        moves = np.asarray(moves)
+        new = self.grids.copy()
+        for direction in range(4):
+            idx = np.nonzero(moves == direction)[0]
+            if not idx.size:
+                continue
+            turned = _to_left(self.grids[idx], direction)
+            rows = (turned.astype(np.uint16) << NIBBLE_SHIFTS).sum(axis=2, dtype=np.uint16)
+            self.score[idx] += SCORE_LEFT[rows].sum(axis=1)
+            slid = ((ROW_LEFT[rows][:, :, None] >> NIBBLE_SHIFTS) & 0xF).astype(np.uint8)
+            new[idx] = _from_left(slid, direction)
+        changed = (new != self.grids).any(axis=(1, 2))
+        self.grids = new
+        return changed
+
+    def spawn(self, mask):
+        # adds a 2 (90%) or a 4 (10%) on a random empty cell of every board selected by the mask
+        idx = np.nonzero(mask)[0]
+        if not idx.size:
+            return
+        cells = self.grids[idx].reshape(-1, 16)
+        empty = cells == 0
+        has_empty = empty.any(axis=1)
+        # the largest random number over the empty cells picks a uniformly random empty cell
+        pick = np.where(empty, self.rng.random(cells.shape), -1.0).argmax(axis=1)
+        values = np.where(self.rng.random(len(idx)) < 0.9, 1, 2).astype(np.uint8)
+        idx, pick, values = idx[has_empty], pick[has_empty], values[has_empty]
+        self.grids[idx, pick // 4, pick % 4] = values
+
+    def check_game_over(self):
+        grids = self.grids
+        empty = (grids == 0).any(axis=(1, 2))
+        horizontal = (grids[:, :, 1:] == grids[:, :, :-1]).any(axis=(1, 2))
+        vertical = (grids[:, 1:, :] == grids[:, :-1, :]).any(axis=(1, 2))
+        return ~(empty | horizontal | vertical)
+
+    def step(self, moves):
+        # one full turn for every board that is still playing: move, spawn where the board changed, check game over
+        changed = self.move(np.where(self.over, -1, moves))
+        self.spawn(changed)
+        self.over = self.check_game_over()
+        return changed
+
+    def boards(self):
+        return grids_to_boards(self.grids)
+
+
+def random_rollouts(boards, scores, rng=None, afterstates=False):
+    # plays every board to the end with uniformly random moves (like random_policy) and returns the final scores,
+    # with afterstates=True the boards are positions right after a move and get their random tile first
+    game = BatchGame.from_boards(boards, scores, rng)
+    if afterstates:
+        game.spawn(np.ones(len(game), dtype=bool))
+        game.over = game.check_game_over()
+    final = game.score.copy()
+    active = np.arange(len(game))
+    while active.size:
+        game.step(game.rng.integers(0, 4, len(game)))
+        done = game.over
+        if done.any():
+            final[active[done]] = game.score[done]
+            # drop the finished boards so the arrays only hold games that are still running
+            keep = ~done
+            active = active[keep]
+            game.grids = game.grids[keep]
+            game.score = game.score[keep]
+            game.over = game.over[keep]
+    return final
+
+
+def batch_mcts(initial_game, iterations=100, verbose=True, rng=None):
+    # same decision as mcts() with random_policy, but all 4 x iterations rollouts run as one batch
+    urdl_score = [0, 0, 0, 0]
+
+    moves = []
+    boards = []
+    scores = []
+    for move in range(4):
+        after, gained, changed = bitboard.slide(initial_game.board, move)
+
+        if not changed:
+            continue
+
+        moves.append(move)
+        boards += [after] * iterations
+        scores += [initial_game.score + gained] * iterations
+
+    final = random_rollouts(boards, scores, rng, afterstates=True).reshape(len(moves), iterations) if moves else []
+    for move, totals in zip(moves, final):
+        urdl_score[move] += int(totals.sum())
+
+    best_move_by_score = urdl_score.index(max(urdl_score))
+
+    initial_game.move(best_move_by_score)
+    if verbose:
+        print(urdl_score)
+        print(str(initial_game))
+        print("Score: " + str(initial_game.score))
+        print()
+    return best_move_by_score
@@ -0,0 +1,190 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from newgame import Game, game_reader, mcts, monte_carlo_simulation, random_policy
+
+# Micro and macro benchmarks of the engine, on fixed positions and seeds so every run does the same work.
+# Every benchmark reports a throughput (operations per second, the median of a few timings of at least a quarter
+# of a second, interleaved with the other benchmarks) and is compared with a stored baseline; a benchmark that is
+# more than --threshold slower than its baseline fails the run.
+#   python benchmarks.py          compare with benchmarks.json, exit status 1 on a regression
+#   python benchmarks.py --save   store the results as the new baseline
+# The baseline depends on the machine, save it again where the benchmarks are compared (e.g. the CI runner).
+# Timings of a quarter of a second and their median keep most of the noise of a busy machine out; on shared runners
+# a larger --threshold may still be needed.
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(DIRECTORY, "benchmarks.json")
+START_FILE = os.path.join(DIRECTORY, "AI", "1.2048")
+THRESHOLD = 0.25
+# rounds of timings, and the minimum length of a timing in seconds
+ROUNDS = 7
+DURATION = 0.25
+SEED = 0
+# a mid-game position on which every move is legal
+MIDGAME = [[2, 8, 16, 4],
+           [4, 32, 64, 8],
+           [2, 0, 128, 2],
+           [0, 4, 8, 0]]
+
+
+def throughput(run, number, duration=DURATION):
+    # operations per second of run(), called number times in a row until at least duration seconds have passed
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(number):
+            run()
+        calls += number
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return calls / elapsed
+
+
+# Every bench_ function sets up its benchmark and returns the operation to time.
+def bench_move(direction):
+    game = Game(gui=False, grid=MIDGAME, rng=random.Random(SEED))
+    snapshot = game.snapshot()
+
+    def run():
+        game.restore(snapshot)
+        game.move(direction)
+
+    return run
+
+
+def bench_check_game_over():
+    # boards of a seeded random game, so the legal moves are not cached from one check to the next
+    game = Game(gui=False, rng=random.Random(SEED))
+    boards = []
+    while len(boards) < 256 and not game.check_game_over():
+        game.move(game.rng.getrandbits(2))
+        boards.append(game.board)
+    boards = itertools.cycle(boards)
+
+    def run():
+        game.board = next(boards)
+        game.check_game_over()
+
+    return run
+
+
+def bench_add_random_tile():
+    game = Game(gui=False, grid=MIDGAME, rng=random.Random(SEED))
+    board = game.board
+
+    def run():
+        game.board = board
+        game.add_random_tile()
+
+    return run
+
+
+def bench_rollout():
+    game = Game(gui=False, grid=game_reader(START_FILE), rng=random.Random(SEED))
+    return lambda: random_policy(game)
+
+
+def bench_mcts_decision():
+    def run():
+        mcts(Game(gui=False, grid=game_reader(START_FILE), rng=random.Random(SEED)), 50, verbose=False)
+
+    return run
+
+
+def bench_full_game():
+    def run():
+        game = Game(gui=False, grid=game_reader(START_FILE), rng=random.Random(SEED))
+        monte_carlo_simulation(game, 10, verbose=False)
+
+    return run
+
+
+# name -> (unit, setup, calls in a row, minimum seconds per timing)
+BENCHMARKS = {
+    "move_up": ("moves", lambda: bench_move(0), 1000, DURATION),
+    "move_right": ("moves", lambda: bench_move(1), 1000, DURATION),
+    "move_down": ("moves", lambda: bench_move(2), 1000, DURATION),
+    "move_left": ("moves", lambda: bench_move(3), 1000, DURATION),
+    "check_game_over": ("checks", bench_check_game_over, 1000, DURATION),
+    "add_random_tile": ("tiles", bench_add_random_tile, 1000, DURATION),
+    "random_policy_rollout": ("rollouts", bench_rollout, 20, DURATION),
+    "mcts_decision": ("decisions (50 rollouts per move)", bench_mcts_decision, 1, DURATION),
+    "full_game": ("games (mcts, 10 rollouts per move)", bench_full_game, 1, 0),
+}
+
+
+def run_benchmarks(names=None, rounds=ROUNDS):
+    # every round times every benchmark once and a benchmark reports the median of its rounds, so the timings of a
+    # benchmark are spread over the whole run and a slow phase of the machine hits all of them alike
+    names = names or list(BENCHMARKS)
+    runs = {name: BENCHMARKS[name][1]() for name in names}
+    rates = {name: [] for name in names}
+    for _ in range(rounds):
+        for name in names:
+            unit, setup, number, duration = BENCHMARKS[name]
+            rates[name].append(throughput(runs[name], number, duration))
+    results = {}
+    for name in names:
+        results[name] = statistics.median(rates[name])
+        print(name + ": " + str(round(results[name], 2)) + " " + BENCHMARKS[name][0] + "/s", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # names of the benchmarks more than threshold slower than their baseline
+    regressions = []
+    print()
+    for name, value in results.items():
+        if name not in baseline:
+            print(name + ": no baseline")
+            continue
+        ratio = value / baseline[name]
+        print(name + ": " + str(round(ratio, 2)) + "x the baseline")
+        if ratio < 1 - threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks.py")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, metavar="FILE")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="fail when a benchmark is more than this fraction slower than the baseline")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: " + name + " (choose from " + ", ".join(BENCHMARKS) + ")")
+
+    results = run_benchmarks(args.names)
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Baseline written to " + args.baseline)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nRegressions (more than " + str(round(100 * args.threshold)) + "% slower): " + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
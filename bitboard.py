@@ -0,0 +1,228 @@
+import math
+import random
+
+import tablecache
+
+# Bitboard representation of the 4x4 grid.
+# Every tile is stored as a 4-bit exponent (0 for an empty cell, 1 for 2, 2 for 4, ... 15 for 32768)
+# and the whole board is packed into one 64-bit integer:
+#   row i lives in bits [16 * i, 16 * i + 16) and cell (i, j) is the nibble at bit 16 * i + 4 * j
+# so a row is a 16-bit value whose lowest nibble is the leftmost tile.
+
+ROW_MASK = 0xFFFF
+COL_MASK = 0x000F000F000F000F
+
+# direction: 0 - up, 1 - right, 2 - down, 3 - left (same as Game.move)
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+
+
+def row_to_list(row):
+    return [(row >> (4 * j)) & 0xF for j in range(4)]
+
+
+def list_to_row(exponents):
+    row = 0
+    for j, e in enumerate(exponents):
+        row |= e << (4 * j)
+    return row
+
+
+def reverse_row(row):
+    return ((row >> 12) & 0xF) | ((row >> 4) & 0xF0) | ((row << 4) & 0xF00) | ((row << 12) & 0xF000)
+
+
+def unpack_col(row):
+    # spread the 4 nibbles of a row over the first column of a board
+    return (row | (row << 12) | (row << 24) | (row << 36)) & COL_MASK
+
+
+def transpose(board):
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def _slide_row_left(exponents):
+    # slide and merge a single row towards index 0, every tile merges at most once
+    tiles = [e for e in exponents if e]
+    result = []
+    score = 0
+    i = 0
+    while i < len(tiles):
+        # 32768 + 32768 would need a fifth bit, so the 65536 tile is never formed
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] < 15:
+            result.append(tiles[i] + 1)
+            score += 2 ** (tiles[i] + 1)
+            i += 2
+        else:
+            result.append(tiles[i])
+            i += 1
+    return result + [0] * (4 - len(result)), score
+
+
+# Lookup tables indexed by a 16-bit row, filled at import time from the table cache (see tablecache.py):
+# computing them takes about half a second, loading them a few milliseconds.
+ROW_LEFT = [0] * 65536
+ROW_RIGHT = [0] * 65536
+COL_UP = [0] * 65536
+COL_DOWN = [0] * 65536
+SCORE_LEFT = [0] * 65536
+SCORE_RIGHT = [0] * 65536
+# legal moves of a single line as a bit mask (bit d set if move d changes it), for a row and for a column
+ROW_LEGAL = [0] * 65536
+COL_LEGAL = [0] * 65536
+# largest exponent of every row
+ROW_TOP = [0] * 65536
+# tile values of every row, 4 entries per row (the values of row r start at 4 * r), for the list of lists view
+ROW_VALUES = [0] * (4 * 65536)
+# (table, array typecode, length) in the cache file
+TABLES = [("ROW_LEFT", "H", 65536), ("ROW_RIGHT", "H", 65536), ("COL_UP", "Q", 65536), ("COL_DOWN", "Q", 65536),
+          ("SCORE_LEFT", "I", 65536), ("SCORE_RIGHT", "I", 65536), ("ROW_LEGAL", "B", 65536),
+          ("COL_LEGAL", "B", 65536), ("ROW_VALUES", "I", 4 * 65536), ("ROW_TOP", "B", 65536)]
+TABLES_VERSION = 3
+
+
+def _compute_tables():
+    tables = {name: [0] * length for name, typecode, length in TABLES}
+    for row in range(65536):
+        exponents = row_to_list(row)
+        left, score = _slide_row_left(exponents)
+        right, right_score = _slide_row_left(exponents[::-1])
+        left_row = list_to_row(left)
+        right_row = list_to_row(right[::-1])
+        tables["ROW_LEFT"][row] = left_row
+        tables["ROW_RIGHT"][row] = right_row
+        tables["COL_UP"][row] = unpack_col(left_row)
+        tables["COL_DOWN"][row] = unpack_col(right_row)
+        tables["SCORE_LEFT"][row] = score
+        tables["SCORE_RIGHT"][row] = right_score
+        tables["ROW_LEGAL"][row] = ((1 << LEFT) if left_row != row else 0) | ((1 << RIGHT) if right_row != row else 0)
+        tables["COL_LEGAL"][row] = ((1 << UP) if left_row != row else 0) | ((1 << DOWN) if right_row != row else 0)
+        tables["ROW_VALUES"][4 * row:4 * row + 4] = [2 ** e if e else 0 for e in exponents]
+        tables["ROW_TOP"][row] = max(exponents)
+    return tables
+
+
+def _init_tables():
+    # the tables are lists, indexing a list is faster than indexing an array
+    for name, table in tablecache.load("bitboard", TABLES_VERSION, TABLES, _compute_tables).items():
+        globals()[name][:] = table.tolist()
+
+
+_init_tables()
+
+
+def move(board, direction):
+    # returns (new board, score gained), the board is unchanged if the move is not possible
+    if direction == LEFT:
+        r0 = board & ROW_MASK
+        r1 = (board >> 16) & ROW_MASK
+        r2 = (board >> 32) & ROW_MASK
+        r3 = (board >> 48) & ROW_MASK
+        return (ROW_LEFT[r0] | (ROW_LEFT[r1] << 16) | (ROW_LEFT[r2] << 32) | (ROW_LEFT[r3] << 48),
+                SCORE_LEFT[r0] + SCORE_LEFT[r1] + SCORE_LEFT[r2] + SCORE_LEFT[r3])
+    if direction == RIGHT:
+        r0 = board & ROW_MASK
+        r1 = (board >> 16) & ROW_MASK
+        r2 = (board >> 32) & ROW_MASK
+        r3 = (board >> 48) & ROW_MASK
+        return (ROW_RIGHT[r0] | (ROW_RIGHT[r1] << 16) | (ROW_RIGHT[r2] << 32) | (ROW_RIGHT[r3] << 48),
+                SCORE_RIGHT[r0] + SCORE_RIGHT[r1] + SCORE_RIGHT[r2] + SCORE_RIGHT[r3])
+
+    # up and down work on the columns: after transposing, column j is the row j
+    t = transpose(board)
+    c0 = t & ROW_MASK
+    c1 = (t >> 16) & ROW_MASK
+    c2 = (t >> 32) & ROW_MASK
+    c3 = (t >> 48) & ROW_MASK
+    if direction == UP:
+        return (COL_UP[c0] | (COL_UP[c1] << 4) | (COL_UP[c2] << 8) | (COL_UP[c3] << 12),
+                SCORE_LEFT[c0] + SCORE_LEFT[c1] + SCORE_LEFT[c2] + SCORE_LEFT[c3])
+    if direction == DOWN:
+        return (COL_DOWN[c0] | (COL_DOWN[c1] << 4) | (COL_DOWN[c2] << 8) | (COL_DOWN[c3] << 12),
+                SCORE_RIGHT[c0] + SCORE_RIGHT[c1] + SCORE_RIGHT[c2] + SCORE_RIGHT[c3])
+    raise ValueError("invalid direction: " + str(direction))
+
+
+def slide(board, direction):
+    # pure move without the random tile: (board after the move, score gained, whether the board changed)
+    after, score = move(board, direction)
+    return after, score, after != board
+
+
+def spawn(board, rng=random):
+    # adds a 2 (90%) or a 4 (10%) on a uniformly random empty cell, rng is anything with a random() method;
+    # a single draw picks both: scaled by the number of empty cells, its integer part is the cell and the
+    # fractional part (again uniform in [0, 1)) decides the value
+    cells = empty_cells(board)
+    if not cells:
+        return board
+    x = rng.random() * len(cells)
+    k = int(x)
+    return board | ((1 if x - k < 0.9 else 2) << (4 * cells[k]))
+
+
+def to_board(grid):
+    # list of lists of tile values -> bitboard
+    board = 0
+    for i in range(4):
+        for j in range(4):
+            if grid[i][j]:
+                board |= int(math.log2(grid[i][j])) << (16 * i + 4 * j)
+    return board
+
+
+def to_grid(board):
+    # bitboard -> list of lists of tile values
+    r0 = (board & ROW_MASK) << 2
+    r1 = ((board >> 16) & ROW_MASK) << 2
+    r2 = ((board >> 32) & ROW_MASK) << 2
+    r3 = ((board >> 48) & ROW_MASK) << 2
+    return [ROW_VALUES[r0:r0 + 4], ROW_VALUES[r1:r1 + 4], ROW_VALUES[r2:r2 + 4], ROW_VALUES[r3:r3 + 4]]
+
+
+def _empty_mask(board):
+    # one bit (the lowest bit of the nibble) set for every empty cell
+    x = board | (board >> 1)
+    x |= x >> 2
+    return ~x & 0x1111111111111111
+
+
+def count_empty(board):
+    return bin(_empty_mask(board)).count("1")
+
+
+def empty_cells(board):
+    # cell indices (4 * i + j) of the empty tiles in row-major order
+    x = _empty_mask(board)
+    cells = []
+    while x:
+        low = x & -x
+        cells.append(low.bit_length() >> 2)
+        x ^= low
+    return cells
+
+
+def legal_moves(board):
+    # bit mask of the moves that change the board (bit d for direction d), 8 table lookups instead of 4 trial moves
+    t = transpose(board)
+    return (ROW_LEGAL[board & ROW_MASK] | ROW_LEGAL[(board >> 16) & ROW_MASK] |
+            ROW_LEGAL[(board >> 32) & ROW_MASK] | ROW_LEGAL[(board >> 48) & ROW_MASK] |
+            COL_LEGAL[t & ROW_MASK] | COL_LEGAL[(t >> 16) & ROW_MASK] |
+            COL_LEGAL[(t >> 32) & ROW_MASK] | COL_LEGAL[(t >> 48) & ROW_MASK])
+
+
+def is_game_over(board):
+    # the game is over when none of the moves changes the board
+    return not legal_moves(board)
+
+
+def max_tile(board):
+    top = max(ROW_TOP[board & ROW_MASK], ROW_TOP[(board >> 16) & ROW_MASK], ROW_TOP[(board >> 32) & ROW_MASK],
+              ROW_TOP[board >> 48])
+    return 2 ** top if top else 0
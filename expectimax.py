@@ -0,0 +1,78 @@
+import bitboard
+
+# Expectimax search on bitboards.
+# Max nodes try the 4 moves, chance nodes average over every empty cell getting a 2 (90%) or a 4 (10%),
+# the same distribution as Game.add_random_tile. The value of a line is the score it gains plus the
+# leaf evaluator at the end of the search depth. Spawn sequences whose probability drops below prob_cutoff
+# are not expanded further and are scored with the evaluator straight away.
+
+# default leaf evaluator: points per empty cell, empty cells are what keeps a game alive
+EMPTY_CELL_VALUE = 256
+
+
+def empty_cells_evaluator(board):
+    return EMPTY_CELL_VALUE * bitboard.count_empty(board)
+
+
+class ExpectimaxSearch:
+    def __init__(self, depth=2, evaluator=empty_cells_evaluator, prob_cutoff=1e-4):
+        # depth: number of moves looked ahead, 1 only looks at the positions right after each move
+        self.depth = depth
+        self.evaluator = evaluator
+        self.prob_cutoff = prob_cutoff
+        self.cache = {}
+        self.nodes = 0
+
+    def move_values(self, board):
+        # expected value of every move from the board, None for moves that do not change it
+        self.cache = {}
+        values = [None, None, None, None]
+        for move in range(4):
+            after, score, changed = bitboard.slide(board, move)
+            if changed:
+                values[move] = score + self.chance_node(after, self.depth, 1.0)
+        return values
+
+    def max_node(self, board, depth, prob):
+        key = (board, depth)
+        if key in self.cache:
+            return self.cache[key]
+        self.nodes += 1
+        best = None
+        for move in range(4):
+            after, score, changed = bitboard.slide(board, move)
+            if changed:
+                value = score + self.chance_node(after, depth, prob)
+                if best is None or value > best:
+                    best = value
+        # no move left: the game is over, nothing more can be gained
+        if best is None:
+            best = 0
+        self.cache[key] = best
+        return best
+
+    def chance_node(self, board, depth, prob):
+        if depth <= 1 or prob < self.prob_cutoff:
+            return self.evaluator(board)
+        cells = bitboard.empty_cells(board)
+        n = len(cells)
+        total = 0
+        for k in cells:
+            total += 0.9 * self.max_node(board | (1 << (4 * k)), depth - 1, prob * 0.9 / n)
+            total += 0.1 * self.max_node(board | (2 << (4 * k)), depth - 1, prob * 0.1 / n)
+        return total / n
+
+
+def expectimax(initial_game, depth=2, evaluator=empty_cells_evaluator, prob_cutoff=1e-4, verbose=True):
+    # picks the move with the highest expected value and plays it, like mcts()
+    search = ExpectimaxSearch(depth, evaluator, prob_cutoff)
+    values = search.move_values(initial_game.board)
+    best_move = max((move for move in range(4) if values[move] is not None), key=lambda move: values[move], default=0)
+
+    initial_game.move(best_move)
+    if verbose:
+        print(values)
+        print(str(initial_game))
+        print("Score: " + str(initial_game.score))
+        print()
+    return best_move
@@ -0,0 +1,96 @@
+import pygame
+
+# pygame front end, imported by newgame.Game only when gui=True.
+# Every tile value is rendered once into its own surface (background, number and border), and a frame only
+# blits the tiles whose nibble changed since the previous frame and sends just those rectangles to the display.
+# A status line under the board shows the suggestions of the AI (see newgame.play_gui).
+
+GRID_SIZE = 4
+TILE_SIZE = 100
+WINDOW_SIZE = TILE_SIZE * GRID_SIZE
+STATUS_HEIGHT = 40
+BG_COLOR = (187, 173, 160)
+TEXT_COLOR = (119, 110, 101)
+# light numbers on the dark tiles past 2048
+LIGHT_TEXT_COLOR = (249, 246, 242)
+TILE_COLORS = {
+    0: (205, 193, 180),
+    2: (238, 228, 218),
+    4: (237, 224, 200),
+    8: (242, 177, 121),
+    16: (245, 149, 99),
+    32: (246, 124, 95),
+    64: (246, 94, 59),
+    128: (237, 207, 114),
+    256: (237, 204, 97),
+    512: (237, 200, 80),
+    1024: (237, 197, 63),
+    2048: (237, 194, 46),
+    4096: (94, 218, 146),
+    8192: (37, 187, 100),
+    16384: (35, 140, 81),
+    32768: (60, 58, 50),
+}
+
+
+class Renderer:
+    def __init__(self, tile_size=TILE_SIZE):
+        pygame.init()
+        self.tile_size = tile_size
+        self.window = pygame.display.set_mode((tile_size * GRID_SIZE, tile_size * GRID_SIZE + STATUS_HEIGHT))
+        self.board_rect = pygame.Rect(0, 0, tile_size * GRID_SIZE, tile_size * GRID_SIZE)
+        self.status_rect = pygame.Rect(0, tile_size * GRID_SIZE, tile_size * GRID_SIZE, STATUS_HEIGHT)
+        self.font = pygame.font.SysFont("Arial", 32)
+        self.small_font = pygame.font.SysFont("Arial", 20)
+        # exponent -> pre-rendered tile surface
+        self.tiles = {}
+        # board and status text currently on the screen, None when they have to be drawn again
+        self.drawn = None
+        self.status_text = None
+
+    def tile(self, exponent):
+        surface = self.tiles.get(exponent)
+        if surface is None:
+            value = 2 ** exponent if exponent else 0
+            surface = pygame.Surface((self.tile_size, self.tile_size))
+            surface.fill(TILE_COLORS[value])
+            if value:
+                text = self.font.render(str(value), True, TEXT_COLOR if value <= 2048 else LIGHT_TEXT_COLOR)
+                surface.blit(text, text.get_rect(center=(self.tile_size / 2, self.tile_size / 2)))
+            pygame.draw.rect(surface, BG_COLOR, surface.get_rect(), 5)
+            surface = surface.convert()
+            self.tiles[exponent] = surface
+        return surface
+
+    def draw(self, board):
+        # draws a bitboard, returns the rectangles that were updated
+        changed = board ^ self.drawn if self.drawn is not None else (1 << 64) - 1
+        rects = []
+        for k in range(GRID_SIZE * GRID_SIZE):
+            if (changed >> (4 * k)) & 0xF:
+                i, j = divmod(k, GRID_SIZE)
+                rects.append(self.window.blit(self.tile((board >> (4 * k)) & 0xF),
+                                              (j * self.tile_size, i * self.tile_size)))
+        self.drawn = board
+        if rects:
+            pygame.display.update(rects)
+        return rects
+
+    def overlay(self, message):
+        # text over the middle of the board, the tiles under it are drawn again on the next frame
+        text = self.font.render(message, True, TEXT_COLOR)
+        rect = self.window.blit(text, text.get_rect(center=self.board_rect.center))
+        pygame.display.update(rect)
+        self.drawn = None
+        return rect
+
+    def status(self, message):
+        # one line of text under the board, only drawn when it changes
+        if message == self.status_text:
+            return None
+        self.window.fill(BG_COLOR, self.status_rect)
+        text = self.small_font.render(message, True, LIGHT_TEXT_COLOR)
+        self.window.blit(text, text.get_rect(midleft=(10, self.status_rect.centery)))
+        pygame.display.update(self.status_rect)
+        self.status_text = message
+        return self.status_rect
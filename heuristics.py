@@ -0,0 +1,121 @@
+import bitboard
+import tablecache
+
+# Static evaluation of a position on bitboards, used to score the leaf of a truncated rollout.
+# Ported from the mergeability and monotonicity heuristics of the notebooks: the board is scored line by line
+# (the 4 rows and the 4 columns, columns being the rows of the transposed board). Every line gets points for its
+# empty cells and for pairs of equal neighbours that can merge, and loses points for not being monotonic.
+# The value is on the scale of game points, so it can be added to the score reached at the cutoff. The default
+# weights were picked for random rollouts cut off after 10 moves, a heavier monotonicity term mostly adds noise there.
+#
+# A line only has 65536 possible values, so every feature is computed once per line and kept in a table
+# (cached on disk next to this module), and Heuristic folds the weighted features into a single table:
+# scoring a board is then 8 lookups.
+
+# per-line features
+#   empty         number of empty cells
+#   merges        pairs of equal neighbours, like mergeability_policy in the notebooks (empty cells are skipped)
+#   monotonicity  how far the line is from being monotonic: the smaller of its total increase and total decrease
+#                 over exponent ** MONOTONICITY_POWER, so large tiles out of order cost more than small ones
+#   sum           sum of the tile values (the tile sum heuristic of the notebooks)
+FEATURES = ("empty", "merges", "monotonicity", "sum")
+DEFAULT_WEIGHTS = {"empty": 270.0, "merges": 700.0, "monotonicity": -1.0, "sum": 0.0}
+MONOTONICITY_POWER = 4.0
+# every position that is still alive is worth this much, so that no evaluated leaf is worth less than a lost game
+ALIVE_VALUE = 200000.0
+
+# bump when the features change (see tablecache.py)
+TABLES_VERSION = 1
+
+
+def empty_count(exponents):
+    return exponents.count(0)
+
+
+def merge_count(exponents):
+    tiles = [e for e in exponents if e]
+    return sum(1 for a, b in zip(tiles, tiles[1:]) if a == b)
+
+
+def monotonicity_penalty(exponents):
+    increase = decrease = 0.0
+    for a, b in zip(exponents, exponents[1:]):
+        if a > b:
+            decrease += a ** MONOTONICITY_POWER - b ** MONOTONICITY_POWER
+        else:
+            increase += b ** MONOTONICITY_POWER - a ** MONOTONICITY_POWER
+    return min(increase, decrease)
+
+
+def tile_sum(exponents):
+    return sum(2 ** e for e in exponents if e)
+
+
+def _compute_tables():
+    tables = {feature: [0.0] * 65536 for feature in FEATURES}
+    for row in range(65536):
+        exponents = bitboard.row_to_list(row)
+        tables["empty"][row] = empty_count(exponents)
+        tables["merges"][row] = merge_count(exponents)
+        tables["monotonicity"][row] = monotonicity_penalty(exponents)
+        tables["sum"][row] = tile_sum(exponents)
+    return tables
+
+
+_tables = None
+
+
+def feature_tables():
+    # feature name -> array of 65536 values, from the table cache (computed on first use)
+    global _tables
+    if _tables is None:
+        _tables = tablecache.load("heuristics", TABLES_VERSION, [(feature, "d", 65536) for feature in FEATURES],
+                                  _compute_tables)
+    return _tables
+
+
+class Heuristic:
+    def __init__(self, weights=None, alive=ALIVE_VALUE):
+        # weights: feature name -> weight, missing features keep their DEFAULT_WEIGHTS value
+        self.weights = dict(DEFAULT_WEIGHTS)
+        for feature, weight in (weights or {}).items():
+            if feature not in DEFAULT_WEIGHTS:
+                raise ValueError("unknown heuristic feature: " + str(feature))
+            self.weights[feature] = float(weight)
+        self.alive = alive
+        tables = feature_tables()
+        self.table = [0.0] * 65536
+        for feature in FEATURES:
+            weight = self.weights[feature]
+            if weight:
+                self.table = [total + weight * value for total, value in zip(self.table, tables[feature])]
+
+    def evaluate(self, board):
+        table = self.table
+        t = bitboard.transpose(board)
+        return (self.alive +
+                table[board & 0xFFFF] + table[(board >> 16) & 0xFFFF] +
+                table[(board >> 32) & 0xFFFF] + table[(board >> 48) & 0xFFFF] +
+                table[t & 0xFFFF] + table[(t >> 16) & 0xFFFF] +
+                table[(t >> 32) & 0xFFFF] + table[(t >> 48) & 0xFFFF])
+
+
+def parse_weights(text):
+    # "empty=270,merges=700" -> {"empty": 270.0, "merges": 700.0}, for the command line
+    weights = {}
+    for item in text.split(","):
+        if item.strip():
+            feature, _, weight = item.partition("=")
+            weights[feature.strip()] = float(weight)
+    return weights
+
+
+_default = None
+
+
+def evaluate(board):
+    # the heuristic with the default weights
+    global _default
+    if _default is None:
+        _default = Heuristic()
+    return _default.evaluate(board)
@@ -1,28 +1,16 @@
-import pygame
 import random
-import copy
 import time
 import math
+import functools
+import os
+import sys
 
-# Define some constants for the game
+import bitboard
+import records
+from transposition import TranspositionTable, new_entry
+
+# Define some constants for the game (the colors and sizes of the window are in gui.py)
 GRID_SIZE = 4
-TILE_SIZE = 100
-WINDOW_SIZE = TILE_SIZE * GRID_SIZE
-BG_COLOR = (187, 173, 160)
-TILE_COLORS = {
-    0: (205, 193, 180),
-    2: (238, 228, 218),
-    4: (237, 224, 200),
-    8: (242, 177, 121),
-    16: (245, 149, 99),
-    32: (246, 124, 95),
-    64: (246, 94, 59),
-    128: (237, 207, 114),
-    256: (237, 204, 97),
-    512: (237, 200, 80),
-    1024: (237, 197, 63),
-    2048: (237, 194, 46)
-}
 
 # utility functions
 
@@ -32,177 +20,117 @@ def get_direction_text(direction):
 
 
 class Game:
-    def __init__(self, gui=True, grid=None):
+    def __init__(self, gui=True, grid=None, rng=None):
         # the gui flag is used to determine whether to render the game or not (might be useful for testing)
+        # rng: random.Random (or anything with the same methods) for the tiles of this game and its rollouts,
+        # the global random module by default
         # Initialize the game
+        # pygame is only imported for the gui, so headless games (workers, benchmarks) never load SDL
         if gui:
+            from gui import Renderer
+
             self.gui = True
-            pygame.init()
-            self.window = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
-            self.font = pygame.font.SysFont("Arial", 32)
+            self.renderer = Renderer()
         if not gui:
             self.gui = False
         self.score = 0
+        self.rng = rng if rng is not None else random
+        self._legal_board = None
         if grid:
-            self.grid = copy.deepcopy(grid)
+            self.board = bitboard.to_board(grid)
         else:
             self.reset()
 
+    # the board is stored as a 64-bit bitboard (see bitboard.py), grid is the list of lists view of it
+    @property
+    def grid(self):
+        return bitboard.to_grid(self.board)
+
+    @grid.setter
+    def grid(self, grid):
+        self.board = bitboard.to_board(grid)
+
+    # cheap copies of the game state for simulations, these replace copy.deepcopy(game) which walks
+    # the whole instance (and the renderer in gui mode)
+    def snapshot(self):
+        # immutable and hashable, can be used as a dictionary key
+        return (self.board, self.score)
+
+    def restore(self, snapshot):
+        self.board, self.score = snapshot
+
+    def clone(self):
+        # the copy is always headless so simulations never render, it draws from the same rng
+        return Game.from_snapshot(self.snapshot(), self.rng)
+
+    @staticmethod
+    def from_snapshot(snapshot, rng=None):
+        game = Game.__new__(Game)
+        game.gui = False
+        game.rng = rng if rng is not None else random
+        game._legal_board = None
+        game.restore(snapshot)
+        return game
+
+    def legal_moves(self):
+        # bit mask of the moves that change the board (bit d for direction d), cached until the board changes
+        # so the game-over check after a move and the next legality queries share one lookup
+        if self._legal_board != self.board:
+            self._legal = bitboard.legal_moves(self.board)
+            self._legal_board = self.board
+        return self._legal
+
     def reset(self):
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        self.board = 0
         self.add_random_tile()
         self.add_random_tile()
         self.score = 0
 
     def add_random_tile(self):
         # Add a random tile to the grid, probability of adding a 2 is 90% and 4 is 10%
-        empty_tiles = []
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                if self.grid[i][j] == 0:
-                    empty_tiles.append((i, j))
-        if empty_tiles:
-            i, j = random.choice(empty_tiles)
-            self.grid[i][j] = 2 if random.random() < 0.9 else 4
+        self.board = bitboard.spawn(self.board, self.rng)
 
     def render(self):
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                # draw the tile
-                pygame.draw.rect(self.window, TILE_COLORS[self.grid[i][j]], (
-                    j * TILE_SIZE, i * TILE_SIZE, TILE_SIZE, TILE_SIZE))
-
-                # add the text to the tile
-                text = self.font.render(
-                    str(self.grid[i][j]) if self.grid[i][j] else "", True, (119, 110, 101))
-                text_rect = text.get_rect()
-                text_rect.center = (
-                    j * TILE_SIZE + TILE_SIZE / 2, i * TILE_SIZE + TILE_SIZE / 2)
-                self.window.blit(text, text_rect)
-
-                # add a border around the tiles
-                pygame.draw.rect(self.window, (187, 173, 160), (j *
-                                 TILE_SIZE, i * TILE_SIZE, TILE_SIZE, TILE_SIZE), 5)
-
-        pygame.display.update()
+        # only the tiles that changed since the last render are drawn (see gui.Renderer)
+        self.renderer.draw(self.board)
 
     def move(self, direction):
         # direction: 0 - up, 1 - right, 2 - down, 3 - left
-        # slide the tiles in the given direction
-        merged = [[False for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        initial_grid = [row[:] for row in self.grid]
-
-        # Slide tiles as far as possible in the given direction, merging tiles of the same value once.
-        if direction == 0:
-            for i in range(GRID_SIZE):
-                for j in range(GRID_SIZE):
-                    shift = 0
-                    for k in range(i):  # k checks all tiles between i and 0
-                        if self.grid[k][j] == 0:
-                            shift += 1
-
-                    if shift:
-                        self.grid[i - shift][j] = self.grid[i][j]
-                        self.grid[i][j] = 0
-
-                    if i - shift - 1 >= 0 and self.grid[i - shift - 1][j] == self.grid[i - shift][j] and not merged[i - shift - 1][j] and not merged[i - shift][j]:
-                        self.score += self.grid[i - shift][j] * 2
-                        self.grid[i - shift - 1][j] *= 2
-                        self.grid[i - shift][j] = 0
-                        merged[i - shift - 1][j] = True
-
-        elif direction == 1:
-            for i in range(GRID_SIZE):
-                for j in range(GRID_SIZE - 1, -1, -1):
-                    shift = 0
-                    for k in range(j + 1, GRID_SIZE):
-                        if self.grid[i][k] == 0:
-                            shift += 1
-
-                    if shift:
-                        self.grid[i][j + shift] = self.grid[i][j]
-                        self.grid[i][j] = 0
-
-                    if j + shift + 1 < GRID_SIZE and self.grid[i][j + shift + 1] == self.grid[i][j + shift] and not merged[i][j + shift + 1] and not merged[i][j + shift]:
-                        self.score += self.grid[i][j + shift] * 2
-                        self.grid[i][j + shift + 1] *= 2
-                        self.grid[i][j + shift] = 0
-                        merged[i][j + shift + 1] = True
-
-        elif direction == 2:
-            for i in range(GRID_SIZE - 1, -1, -1):
-                for j in range(GRID_SIZE):
-                    shift = 0
-                    for k in range(i + 1, GRID_SIZE):
-                        if self.grid[k][j] == 0:
-                            shift += 1
-
-                    if shift:
-                        self.grid[i + shift][j] = self.grid[i][j]
-                        self.grid[i][j] = 0
-
-                    if i + shift + 1 < GRID_SIZE and self.grid[i + shift + 1][j] == self.grid[i + shift][j] and not merged[i + shift + 1][j] and not merged[i + shift][j]:
-                        self.score += self.grid[i + shift][j] * 2
-                        self.grid[i + shift + 1][j] *= 2
-                        self.grid[i + shift][j] = 0
-                        merged[i + shift + 1][j] = True
-
-        elif direction == 3:
-            for i in range(GRID_SIZE):
-                for j in range(GRID_SIZE):
-                    shift = 0
-                    for k in range(j):
-                        if self.grid[i][k] == 0:
-                            shift += 1
-
-                    if shift:
-                        self.grid[i][j - shift] = self.grid[i][j]
-                        self.grid[i][j] = 0
-
-                    if j - shift - 1 >= 0 and self.grid[i][j - shift - 1] == self.grid[i][j - shift] and not merged[i][j - shift - 1] and not merged[i][j - shift]:
-                        self.score += self.grid[i][j - shift] * 2
-                        self.grid[i][j - shift - 1] *= 2
-                        self.grid[i][j - shift] = 0
-                        merged[i][j - shift - 1] = True
-
-        if self.grid != initial_grid:
+        # returns (status, grid): status 0 if the move was played, 1 if it ended the game, 2 if it was not legal
+        return self.play(direction), self.grid
+
+    def play(self, direction):
+        # move() without building the grid, for the rollouts: returns the status only
+        # slide the tiles in the given direction using the precomputed row tables, then spawn a new tile
+        if not (self.legal_moves() >> direction) & 1:
+            return 2
+        board, score, changed = bitboard.slide(self.board, direction)
+
+        if changed:
+            self.board = board
+            self.score += score
             self.add_random_tile()
             if self.check_game_over():
-                if self.gui:
-                    pygame.time.delay(5000)
-                    pygame.quit()
-                return (1, self.grid)
+                return 1
             if self.gui:
                 self.render()
-            return (0, self.grid)
+            return 0
         else:
-            return (2, self.grid)
+            return 2
 
     def check_game_over(self):
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                if self.grid[i][j] == 0:
-                    return
-                if i > 0 and self.grid[i - 1][j] == self.grid[i][j]:
-                    return
-                if i < GRID_SIZE - 1 and self.grid[i + 1][j] == self.grid[i][j]:
-                    return
-                if j > 0 and self.grid[i][j - 1] == self.grid[i][j]:
-                    return
-                if j < GRID_SIZE - 1 and self.grid[i][j + 1] == self.grid[i][j]:
-                    return
-
-        # overlay text on the screen
+        if self.legal_moves():
+            return
+
+        # overlay text on the screen, over the final board
         if self.gui:
-            text = self.font.render("Game Over!", True, (119, 110, 101))
-            text_rect = text.get_rect()
-            text_rect.center = (WINDOW_SIZE / 2, WINDOW_SIZE / 2)
-            self.window.blit(text, text_rect)
-            pygame.display.update()
+            self.render()
+            self.renderer.overlay("Game Over!")
         return True
 
     def __str__(self):
-        return "\n".join([" ".join([str(self.grid[i][j]) for j in range(GRID_SIZE)]) for i in range(GRID_SIZE)])
+        grid = self.grid
+        return "\n".join([" ".join([str(grid[i][j]) for j in range(GRID_SIZE)]) for i in range(GRID_SIZE)])
 
 
 def game_reader(file):
@@ -214,145 +142,857 @@ def game_reader(file):
         return grid
 
 
-def play_gui(file):
-    game = Game(gui=True, grid=game_reader(file))
+def advisor_worker(requests, results, engine, rollouts, policy, depth, seed):
+    # runs in the advisor process: searches every requested position (board, score) and sends
+    # (board, move, final) after each round, expectimax one ply deeper every round, the rollout engines with
+    # twice the rollouts; a newer request (None to stop) makes the rounds left for the current one stale
+    rng = random.Random(seed)
+    if engine == "expectimax":
+        rounds = [(rollouts, d) for d in range(1, depth + 1)]
+    else:
+        rounds = [(max(1, rollouts // 4), depth), (max(1, rollouts // 2), depth), (rollouts, depth)]
+
+    request = requests.get()
+    stop = request is None
+    while not stop:
+        board, score = request
+        newer = None
+        for i, (round_rollouts, round_depth) in enumerate(rounds):
+            game = Game.from_snapshot((board, score), rng)
+            search = make_engine(engine, round_rollouts, policy, rng.getrandbits(32), None, round_depth)
+            results.put((board, search(game), i == len(rounds) - 1))
+            # only the latest request counts, but the stop sentinel always wins (it is the last thing close() sends)
+            while not stop and not requests.empty():
+                newer = requests.get()
+                stop = newer is None
+            if stop or newer is not None or i == len(rounds) - 1:
+                break
+        if not stop:
+            request = newer if newer is not None else requests.get()
+            stop = request is None
+
+
+class Advisor:
+    # move suggestions for the gui, the search runs in its own process so the window keeps its frame rate
+    def __init__(self, engine="expectimax", rollouts=50, policy="random", depth=2, seed=None):
+        import multiprocessing
+
+        # a fresh interpreter rather than a fork of the process that has SDL running, importing the engine is cheap
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.process = context.Process(target=advisor_worker, daemon=True,
+                                               args=(self.requests, self.results, engine, rollouts, policy, depth,
+                                                     seed))
+        self.process.start()
+        self.board = None
+        self.best = None
+
+    def ask(self, game):
+        # starts the search for the position of the game, unless it is already the one being searched
+        if game.board != self.board:
+            self.board = game.board
+            self.best = None
+            if game.legal_moves():
+                self.requests.put(game.snapshot())
+
+    def poll(self):
+        # (move, final) for the last position asked, None while the first round is running
+        import queue
+
+        while True:
+            try:
+                board, move, final = self.results.get_nowait()
+            except queue.Empty:
+                return self.best
+            if board == self.board:
+                self.best = (move, final)
+
+    def close(self):
+        self.requests.put(None)
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def play_gui(file=None, assist=False, autoplay=False, engine="expectimax", rollouts=50, policy="random", depth=2,
+             seed=None, fps=60):
+    # arrow keys to play, A to switch autoplay on and off; the window stays open after the game is over
+    # assist: show the move suggested by the Advisor under the board, autoplay: play it once its search is done
+    # the loop sleeps between frames (at most fps frames per second) instead of polling the events nonstop
+    import pygame
+
+    keys = {pygame.K_UP: 0, pygame.K_RIGHT: 1, pygame.K_DOWN: 2, pygame.K_LEFT: 3}
+    game = Game(gui=True, grid=game_reader(file) if file else None, rng=random.Random(seed))
     game.render()
-    while not game.check_game_over():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    game.move(0)
-                elif event.key == pygame.K_RIGHT:
-                    game.move(1)
-                elif event.key == pygame.K_DOWN:
-                    game.move(2)
-                elif event.key == pygame.K_LEFT:
-                    game.move(3)
-
-    pygame.time.delay(5000)
-    pygame.quit()
+    clock = pygame.time.Clock()
+    advisor = None
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key in keys:
+                    game.move(keys[event.key])
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_a:
+                    autoplay = not autoplay
+
+            if (assist or autoplay) and advisor is None:
+                advisor = Advisor(engine, rollouts, policy, depth, seed)
+            if advisor is not None and game.legal_moves():
+                advisor.ask(game)
+                best = advisor.poll()
+                if best is None:
+                    status = "AI: thinking..."
+                else:
+                    status = "AI: " + get_direction_text(best[0]) + ("" if best[1] else " (searching deeper)")
+                game.renderer.status(("Autoplay - " if autoplay else "") + status + "   Score: " + str(game.score))
+                if autoplay and best is not None and best[1]:
+                    game.move(best[0])
+            else:
+                game.renderer.status("Score: " + str(game.score))
+            clock.tick(fps)
+    finally:
+        if advisor is not None:
+            advisor.close()
+        pygame.quit()
 
 
 # play_gui("1.2048")
 
 # exit()
 
-def random_policy(game):
-    game_copy = copy.deepcopy(game)
-    while not game_copy.check_game_over():
-        game_copy.move(random.randint(0, 3))
-    return game_copy.score, max(max(row) for row in game_copy.grid)
+def rollout_value(game, evaluator=None):
+    # score at the end of a rollout, plus the static evaluation of the leaf if the rollout was cut off early
+    if evaluator is None or bitboard.is_game_over(game.board):
+        return game.score
+    return game.score + evaluator(game.board)
+
+
+def random_policy(game, depth=None, evaluator=None):
+    # depth: optional number of moves after which the rollout is cut off, the evaluator (a function of the board,
+    # e.g. heuristics.evaluate) then stands in for the points the rest of the game would have gained
+    game_copy = game.clone()
+    moves = 0
+    while not game_copy.check_game_over() and (depth is None or moves < depth):
+        status = game_copy.play(game_copy.rng.getrandbits(2))
+        # the depth counts moves actually played, an illegal move (status 2) changes nothing
+        if status != 2:
+            moves += 1
+    return rollout_value(game_copy, evaluator), bitboard.max_tile(game_copy.board)
+
+
+
+prev_move = -1
+
+
+def move_available(game, move):
+    return bool((game.legal_moves() >> move) & 1)
+
+
+def next_move(game):
+    global prev_move
+    move = 0
+    if move == prev_move:
+        move = 3
+    if not move_available(game, move):
+        priority = [0, 3, 1, 2]
+        for i in priority:
+            move = i
+            if move_available(game, move):
+                break
+    prev_move = move
+    return move
+
+
+def weighted_random_policy(game, depth=None, evaluator=None):
+    game_copy = game.clone()
+    weights = [2, 1, 2, 1]  # weights for each move
+    moves = 0
+    while not game_copy.check_game_over() and (depth is None or moves < depth):
+        # make a weighted random choice of move
+        move = game_copy.rng.choices(range(4), weights=weights)[0]
+        old_score = game_copy.score
+        old_max = bitboard.max_tile(game_copy.board)
+        status = game_copy.play(move)
+        if status != 2:
+            moves += 1
+        new_score = game_copy.score
+        new_max = bitboard.max_tile(game_copy.board)
+        # if the move resulted in a higher score or max value, increase its weight
+        if new_score > old_score or new_max > old_max:
+            weights[move] += 1
+    return rollout_value(game_copy, evaluator), bitboard.max_tile(game_copy.board)
+
+
+def priority_policy(game, depth=None, evaluator=None):
+    global prev_move
+    # every rollout starts from the same state, whatever ran before it in this process
+    prev_move = -1
+    game_copy = game.clone()
+    moves = 0
+    while not game_copy.check_game_over() and (depth is None or moves < depth):
+        status = game_copy.play(next_move(game_copy))
+        if status != 2:
+            moves += 1
+    return rollout_value(game_copy, evaluator), bitboard.max_tile(game_copy.board)
+
+
+# rollout policies that can be picked by name from the command line
+POLICIES = {
+    "random": random_policy,
+    "weighted": weighted_random_policy,
+    "priority": priority_policy,
+}
 
 
-def mcts(initial_game):
-    urdl_score = [0, 0, 0, 0]
+def afterstate_rollout(policy, game, afterstate):
+    # one rollout from the snapshot of a position right after a move: every rollout draws its own random tile
+    # before the policy plays on
+    game.restore(afterstate)
+    game.add_random_tile()
+    return policy(game)[0]
+
+
+def rollout_batch(policy, snapshot, count, rng=None):
+    # sum of the final scores of `count` rollouts of `policy` from the afterstate snapshot
+    game = Game.from_snapshot(snapshot, rng)
+    total = 0
+    for i in range(count):
+        total += afterstate_rollout(policy, game, snapshot)
+    return total
+
+
+def anytime_rollouts(policy, snapshots, counts, deadline, rng=None):
+    # one rollout per snapshot in turn until every snapshot had its count or the deadline (time.perf_counter) passes,
+    # so the rollouts done so far are spread evenly whenever the search is stopped
+    games = [Game.from_snapshot(snapshot, rng) for snapshot in snapshots]
+    totals = [0] * len(snapshots)
+    done = [0] * len(snapshots)
+    progressed = True
+    while progressed and time.perf_counter() < deadline:
+        progressed = False
+        for i, game in enumerate(games):
+            if done[i] < counts[i] and time.perf_counter() < deadline:
+                totals[i] += afterstate_rollout(policy, game, snapshots[i])
+                done[i] += 1
+                progressed = True
+    return totals, done
+
+
+def successive_halving(policy, snapshots, budget, executor=None, rng=None):
+    # rounds of equal rollouts for the moves still in the race, the worse half is dropped after every round;
+    # every round gets an equal share of what is left of the budget, and once that cannot pay for one more round
+    # the best move so far wins; apart from the first round (at least one rollout per move) no more than `budget`
+    # rollouts are played
+    totals = [0] * len(snapshots)
+    counts = [0] * len(snapshots)
+    alive = list(range(len(snapshots)))
+    left = budget
+    while True:
+        rounds = max(1, math.ceil(math.log2(len(alive))))
+        per_move = max(1, left // (len(alive) * rounds))
+        left -= per_move * len(alive)
+        if executor is not None:
+            results = executor.run(policy, [snapshots[i] for i in alive], per_move)
+        else:
+            results = [rollout_batch(policy, snapshots[i], per_move, rng) for i in alive]
+        for i, total in zip(alive, results):
+            totals[i] += total
+            counts[i] += per_move
+        alive.sort(key=lambda i: totals[i] / counts[i], reverse=True)
+        alive = alive[:math.ceil(len(alive) / 2)]
+        if len(alive) == 1 or left < len(alive):
+            return totals, counts, alive[:1]
+
+
+def ucb_allocation(policy, snapshots, budget, exploration=1.0, rng=None):
+    # UCB1 over the moves: every rollout goes to the move with the best optimistic estimate, the averages are
+    # rescaled to [0, 1] between the worst and the best move so the exploration term does not depend on the score
+    games = [Game.from_snapshot(snapshot, rng) for snapshot in snapshots]
+    totals = [0] * len(snapshots)
+    counts = [0] * len(snapshots)
+    for t in range(max(budget, len(snapshots))):
+        if t < len(snapshots):
+            i = t
+        else:
+            means = [total / count for total, count in zip(totals, counts)]
+            low, high = min(means), max(means)
+            spread = high - low or 1
+            log_t = math.log(t)
+            i = max(range(len(snapshots)),
+                    key=lambda j: (means[j] - low) / spread + exploration * math.sqrt(log_t / counts[j]))
+        totals[i] += afterstate_rollout(policy, games[i], snapshots[i])
+        counts[i] += 1
+    return totals, counts, list(range(len(snapshots)))
 
-    for move in range(4):
-        game_copy = copy.deepcopy(initial_game)
-        result, grid = game_copy.move(move)
 
-        if result == 2:
-            continue
+ALLOCATIONS = ["uniform", "halving", "ucb"]
 
-        # try random policy for 100 games
-        for i in range(100):
-            game_copy = copy.deepcopy(initial_game)
-            output = random_policy(game_copy)
 
-            urdl_score[move] += output[0]
-            
+def legal_afterstates(game):
+    # (legal moves, afterstate snapshots): the afterstates are the positions right after each move, before the
+    # random tile
+    moves = []
+    afterstates = []
+    for move in range(4):
+        after, gained, changed = bitboard.slide(game.board, move)
+        if changed:
+            moves.append(move)
+            afterstates.append((after, game.score + gained))
+    return moves, afterstates
+
+
+def allocate_rollouts(policy, afterstates, counts, allocation="uniform", executor=None, time_limit=None, rng=None):
+    # plays the rollouts of every afterstate as mcts asks for them (see mcts for the options), counts are the
+    # rollouts wanted per afterstate; returns (totals, rollouts played, indices of the afterstates still in the race)
+    alive = list(range(len(afterstates)))
+    if allocation != "uniform" and (len(afterstates) < 2 or not sum(counts)):
+        # a forced move needs no rollouts, and neither does a position the table already has the full budget for
+        return [0] * len(afterstates), [0] * len(afterstates), alive
+    if allocation == "halving":
+        return successive_halving(policy, afterstates, sum(counts), executor, rng)
+    if allocation == "ucb":
+        return ucb_allocation(policy, afterstates, sum(counts), rng=rng)
+    if time_limit is not None:
+        totals, counts = anytime_rollouts(policy, afterstates, counts, time.perf_counter() + time_limit, rng)
+    elif executor is not None:
+        totals = executor.run(policy, afterstates, counts)
+    else:
+        totals = [rollout_batch(policy, snapshot, count, rng) if count else 0
+                  for snapshot, count in zip(afterstates, counts)]
+    return totals, counts, alive
+
+
+def mcts(initial_game, iterations=100, executor=None, policy=random_policy, verbose=True, table=None, time_limit=None,
+         allocation="uniform"):
+    # executor: optional parallel.RolloutExecutor to spread the rollouts over worker processes
+    # table: optional transposition.TranspositionTable, rollouts already stored for this position are reused
+    # and only the missing ones are played; the moves are then ranked by their average score gain
+    # time_limit: optional budget in seconds, the rollouts are interleaved across the moves and the best move so far
+    # is played when the time is up (iterations is then only an upper bound)
+    # allocation: "uniform" gives every move `iterations` rollouts, "halving" (successive halving) and "ucb" spread
+    # the same total budget adaptively so that clearly worse moves stop getting rollouts early
+    if allocation not in ALLOCATIONS:
+        raise ValueError("unknown allocation: " + str(allocation))
+    if time_limit is not None and executor is not None:
+        raise ValueError("time_limit is not supported together with an executor")
+    if allocation != "uniform" and time_limit is not None:
+        raise ValueError("time_limit is only supported with the uniform allocation")
+    if allocation == "ucb" and executor is not None:
+        raise ValueError("the ucb allocation is sequential and does not support an executor")
 
-    print(urdl_score)
+    urdl_score = [0, 0, 0, 0]
 
-    best_move_by_score = urdl_score.index(max(urdl_score))
+    entry = None
+    if table is not None:
+        entry = table.get(initial_game.board)
+        if entry is None:
+            entry = new_entry()
+    # with a table, a time limit or an adaptive allocation the moves do not get the same number of rollouts and are
+    # ranked by their average, illegal or unevaluated moves are left at None and never picked
+    average = table is not None or time_limit is not None or allocation != "uniform"
+    if average:
+        urdl_score = [None, None, None, None]
+
+    moves, afterstates = legal_afterstates(initial_game)
+    counts = [iterations if entry is None else max(0, iterations - int(entry[4 + move])) for move in moves]
+
+    # try the rollout policy for `iterations` games, starting from the position after each move
+    totals, counts, alive = allocate_rollouts(policy, afterstates, counts, allocation, executor, time_limit,
+                                              initial_game.rng)
+    candidates = [moves[i] for i in alive]
+
+    for move, total, count in zip(moves, totals, counts):
+        if entry is not None:
+            entry[move] += total - count * initial_game.score
+            entry[4 + move] += count
+            total, count = entry[move], entry[4 + move]
+        if not average:
+            urdl_score[move] += total
+        elif count and move in candidates:
+            urdl_score[move] = total / count
+    if entry is not None:
+        table.store(initial_game.board, entry)
+
+    # only legal moves are ranked, rollouts cut off with an evaluator can be worth less than the 0 of an illegal move;
+    # if nothing could be evaluated in time any legal move is better than an illegal one
+    ranked = [move for move in moves if urdl_score[move] is not None]
+    best_move_by_score = max(ranked, key=lambda move: urdl_score[move]) if ranked else (moves[0] if moves else 0)
 
     initial_game.move(best_move_by_score)
-    print(str(initial_game))
-    print("Score: " + str(initial_game.score))
-    print()
-
-
-def monte_carlo_simulation(initial_game):
-    game = copy.deepcopy(initial_game)
-    iterations = 1
+    if verbose:
+        print(urdl_score)
+        print(str(initial_game))
+        print("Score: " + str(initial_game.score))
+        print()
+    return best_move_by_score
+
+
+def monte_carlo_simulation(initial_game, iterations=100, executor=None, policy=random_policy, verbose=True, engine=None):
+    # engine: optional function that plays one move of the game (see make_engine), mcts by default
+    game = initial_game.clone()
+    run = 1
     while not game.check_game_over():
-        mcts(game)
-        iterations += 1
+        if engine is None:
+            mcts(game, iterations, executor, policy, verbose)
+        else:
+            engine(game)
+        run += 1
 
-    print("Final State:\n", str(game))
-    print("Score: " + str(game.score))
-    print("Max Tile: " + str(max(max(row) for row in game.grid)))
-    print("Iterations: " + str(iterations))
+    if verbose:
+        print("Final State:\n", str(game))
+        print("Score: " + str(game.score))
+        print("Max Tile: " + str(max(max(row) for row in game.grid)))
+        print("Iterations: " + str(run))
 
     return game.score, max(max(row) for row in game.grid), game.grid
-                
-
-Sum = 0
-Max = 0
-Max_game = None
-_2prob = 0
-_4prob = 0
-_8prob = 0
-_16prob = 0
-_32prob = 0
-_64prob = 0
-_128prob = 0
-_256prob = 0
-_512prob = 0
-_1024prob = 0
-_2048prob = 0
-_4096prob = 0
-
-init_time = time.time()
-for i in range(1):      # number of games to play
-    game = Game(gui=False)
-    (score, max_tile, grid) = monte_carlo_simulation(game)
-    Sum += score
-    if score > Max:
-        Max = score
-        Max_game = grid
-    if any(4096 in row for row in grid):
-        _4096prob += 1
-    if any(2048 in row for row in grid):
-        _2048prob += 1
-    if any(1024 in row for row in grid):
-        _1024prob += 1
-    if any(512 in row for row in grid):
-        _512prob += 1
-    if any(256 in row for row in grid):
-        _256prob += 1
-    if any(128 in row for row in grid):
-        _128prob += 1
-    if any(64 in row for row in grid):
-        _64prob += 1
-    if any(32 in row for row in grid):
-        _32prob += 1
-    if any(16 in row for row in grid):
-        _16prob += 1
-    if any(8 in row for row in grid):
-        _8prob += 1
-    if any(4 in row for row in grid):
-        _4prob += 1
-    if any(2 in row for row in grid):
-        _2prob += 1
-
-print("\nTime taken (s): " + str(time.time() - init_time))
-
-print("\nAverage Score: " + str(Sum / 100))
-print("Max Score: " + str(Max))
-print("Best Game:\n", str(Max_game))
-print("2: " + str(_2prob/100))
-print("4: " + str(_4prob/100))
-print("8: " + str(_8prob/100))
-print("16: " + str(_16prob/100))
-print("32: " + str(_32prob/100))
-print("64: " + str(_64prob/100))
-print("128: " + str(_128prob/100))
-print("256: " + str(_256prob/100))
-print("512: " + str(_512prob/100))
-print("1024: " + str(_1024prob/100))
-print("2048: " + str(_2048prob/100))
-print("4096: " + str(_4096prob/100))
+
+
+# benchmark driver
+
+
+ENGINES = ["mcts", "batch", "expectimax", "uct"]
+
+
+@functools.lru_cache(maxsize=None)
+def load_evaluator(path):
+    # evaluate() of an n-tuple network trained with `python -m newgame train`, mapped once per process;
+    # the checksum is verified once by bench() before the workers start
+    from ntuple import NTupleNetwork
+
+    return NTupleNetwork.load(path, verify=False).evaluate
+
+
+@functools.lru_cache(maxsize=None)
+def load_heuristic(weights):
+    # evaluate() of the static heuristic with these (feature, weight) pairs, its table is built once per process
+    import heuristics
+
+    return heuristics.Heuristic(dict(weights)).evaluate
+
+
+def check_engine_options(name, policy="random", table=None, time_limit=None, allocation="uniform", rollout_depth=None):
+    # the rollout policy, the transposition table, the allocation and truncated rollouts are mcts options and only
+    # mcts and uct have a time limit; the other engines refuse them rather than silently ignoring them
+    unsupported = [option for option, used in [("the " + str(policy) + " policy", policy != "random"),
+                                               ("a transposition table", table is not None),
+                                               ("a time limit", time_limit is not None and name != "uct"),
+                                               ("the " + str(allocation) + " allocation", allocation != "uniform"),
+                                               ("a rollout depth", rollout_depth is not None)] if used]
+    if name != "mcts" and unsupported:
+        raise ValueError("the " + name + " engine does not support " + ", ".join(unsupported))
+
+
+def make_engine(name, rollouts, policy, seed, table=None, depth=2, time_limit=None, allocation="uniform",
+                rollout_depth=None, weights=None, heuristic_weights=None):
+    # returns a function that plays one move of a game with the chosen search,
+    # engines with optional dependencies are only imported when they are used
+    # mcts draws from the rng of the game it plays, the other engines get their own stream from the seed
+    # weights: optional n-tuple network file, used as the evaluator of expectimax and of truncated rollouts
+    # heuristic_weights: optional feature weights for the static heuristic (see heuristics.py), used the same way
+    check_engine_options(name, policy, table, time_limit, allocation, rollout_depth)
+    evaluator = None
+    if weights:
+        evaluator = load_evaluator(weights)
+    elif heuristic_weights:
+        evaluator = load_heuristic(tuple(sorted(heuristic_weights.items())))
+    if name == "mcts":
+        rollout_policy = POLICIES[policy]
+        if rollout_depth is not None:
+            # truncated rollouts, the leaf is scored with the network or the static heuristic
+            import heuristics
+
+            rollout_policy = functools.partial(rollout_policy, depth=rollout_depth,
+                                               evaluator=evaluator or heuristics.evaluate)
+        return functools.partial(mcts, iterations=rollouts, policy=rollout_policy, verbose=False, table=table,
+                                 time_limit=time_limit, allocation=allocation)
+    if name == "batch":
+        # NumPy batch simulator, runs all the random rollouts of a move at once
+        import numpy as np
+        from batch import batch_mcts
+
+        return functools.partial(batch_mcts, iterations=rollouts, verbose=False, rng=np.random.default_rng(seed))
+    if name == "expectimax":
+        from expectimax import expectimax, empty_cells_evaluator
+
+        return functools.partial(expectimax, depth=depth, evaluator=evaluator or empty_cells_evaluator, verbose=False)
+    if name == "uct":
+        # one search per game, so the tree is carried over from move to move
+        from uct import UCTSearch, uct
+
+        return functools.partial(uct, iterations=rollouts, search=UCTSearch(rng=random.Random(seed)), verbose=False,
+                                 time_limit=time_limit)
+    raise ValueError("unknown engine: " + name)
+
+
+# transposition table kept by a worker process across all the games it plays (bench --share-table)
+shared_table = None
+
+
+def play_benchmark_game(engine, policy, rollouts, seed, table_mb=0, share_table=False, symmetric=False, depth=2,
+                        time_limit=None, allocation="uniform", rollout_depth=None, weights=None,
+                        heuristic_weights=None, record=False, collect_stats=False):
+    # plays one full game in a worker process, every game gets its own seed and random stream
+    # record: also return every move (board, move, spawn, score) for records.RecordWriter
+    # collect_stats: also return the hot path counters and timers of the game (see stats.py)
+    global shared_table
+    start = time.time()
+
+    table = None
+    if table_mb and share_table:
+        if shared_table is None:
+            shared_table = TranspositionTable(max_bytes=table_mb * 2 ** 20, canonical=symmetric)
+        table = shared_table
+    elif table_mb:
+        table = TranspositionTable(max_bytes=table_mb * 2 ** 20, canonical=symmetric)
+    hits, misses, evictions = (table.hits, table.misses, table.evictions) if table else (0, 0, 0)
+
+    if collect_stats:
+        # before the engine is made, so the evaluators it picks up are the instrumented ones
+        import stats
+
+        stats.enable()
+    search = make_engine(engine, rollouts, policy, seed, table, depth, time_limit, allocation, rollout_depth, weights,
+                         heuristic_weights)
+    if collect_stats:
+        search = stats.timed("decisions", search)
+    moves = 0
+    log = [] if record else None
+
+    def play_move(game):
+        nonlocal moves
+        moves += 1
+        before = game.board
+        move = search(game)
+        if log is not None:
+            log.append((before, move, records.encode_spawn(bitboard.slide(before, move)[0], game.board), game.score))
+
+    game = Game(gui=False, rng=random.Random(seed))
+    score, max_tile, grid = monte_carlo_simulation(game, verbose=False, engine=play_move)
+    result = {"seed": seed, "score": score, "max_tile": max_tile, "grid": grid, "moves": moves,
+              "time": time.time() - start}
+    if log is not None:
+        result["record"] = {"board": game.board, "moves": log, "final_board": bitboard.to_board(grid)}
+    if collect_stats:
+        result["stats"] = stats.STATS.raw()
+    if table:
+        result["table"] = {"hits": table.hits - hits, "misses": table.misses - misses,
+                           "evictions": table.evictions - evictions, "entries": len(table)}
+    return result
+
+
+def summarize(results, elapsed, rollouts):
+    games = len(results)
+    scores = [r["score"] for r in results]
+    best = max(results, key=lambda r: r["score"])
+
+    print("\nTime taken (s): " + str(elapsed))
+    print("Number of games: " + str(games))
+    print("Number of rollouts for mcts: " + str(rollouts))
+    print("Average Time per Game (s): " + str(sum(r["time"] for r in results) / games))
+    print("Average Time per Move (ms): " + str(1000 * sum(r["time"] for r in results) / sum(r["moves"] for r in results)))
+
+    print("\nAverage Score: " + str(sum(scores) / games))
+    print("Max Score: " + str(max(scores)))
+    print("Best Game:\n" + "\n".join(" ".join(str(x) for x in row) for row in best["grid"]))
+
+    # probability of reaching every tile, up to the largest one seen
+    print()
+    top = int(math.log2(max(r["max_tile"] for r in results)))
+    for power in range(1, top + 1):
+        reached = sum(1 for r in results if r["max_tile"] >= 2 ** power)
+        print(str(2 ** power) + ": " + str(reached / games))
+
+    if "table" in results[0]:
+        hits = sum(r["table"]["hits"] for r in results)
+        misses = sum(r["table"]["misses"] for r in results)
+        evictions = sum(r["table"]["evictions"] for r in results)
+        print("\nTransposition table: " + str(hits) + " hits, " + str(misses) + " misses (hit rate " +
+              str(round(hits / max(1, hits + misses), 3)) + "), " + str(evictions) + " evictions")
+
+    if "stats" in results[0]:
+        import stats
+
+        # rates are per worker: the time of every game is added up
+        total = stats.report(stats.merge(r["stats"] for r in results))
+        print("\nCalls (per second of game time):")
+        for name, count in total["counters"].items():
+            print("  " + name + ": " + str(count) + " (" + str(total["per_second"][name]) + "/s)")
+        for name, ms in total["ms_per_call"].items():
+            print("  " + name + ": " + str(ms) + " ms per call, " +
+                  str(round(100 * total["seconds"][name] / max(total["elapsed"], 1e-9), 1)) + "% of the time")
+
+
+def bench(games=25, rollouts=50, policy="random", workers=None, seed=0, engine="mcts", table_mb=0, share_table=False,
+          symmetric=False, depth=2, time_limit=None, allocation="uniform", rollout_depth=None, weights=None,
+          heuristic_weights=None, record=None, stats_file=None):
+    # plays independent games on a process pool and prints each result as soon as the game finishes
+    # record: optional path of a game record file (see records.py), games are appended as they finish
+    # stats_file: optional path, the counters and timers of every game (see stats.py) are written to it as one
+    # JSON line per game as the games finish, and the total of all the games as the last line
+    import json
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if weights:
+        import weights as weight_file
+
+        weight_file.verify(weights)
+    results = []
+    init_time = time.time()
+    writer = records.RecordWriter(record) if record else None
+    stats_stream = open(stats_file, "w") if stats_file else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_benchmark_game, engine, policy, rollouts, seed + i, table_mb, share_table, symmetric,
+                               depth, time_limit, allocation, rollout_depth, weights, heuristic_weights,
+                               writer is not None, stats_stream is not None)
+                   for i in range(games)]
+        for future in as_completed(futures):
+            result = future.result()
+            if writer is not None:
+                # only the summary is kept in memory
+                game = result.pop("record")
+                writer.write_game(result["seed"], game["board"], game["moves"], game["final_board"], result["score"])
+            if stats_stream is not None:
+                import stats
+
+                stats_stream.write(json.dumps(dict(stats.report(result["stats"]), seed=result["seed"])) + "\n")
+                stats_stream.flush()
+            results.append(result)
+            print("Game " + str(len(results)) + "/" + str(games) + " (seed " + str(result["seed"]) + "): score " +
+                  str(result["score"]) + ", max tile " + str(result["max_tile"]) + ", " +
+                  str(round(result["time"], 1)) + " s", flush=True)
+    if writer is not None:
+        writer.close()
+    if stats_stream is not None:
+        stats_stream.write(json.dumps(dict(stats.report(stats.merge(r["stats"] for r in results)), total=True)) + "\n")
+        stats_stream.close()
+
+    summarize(results, time.time() - init_time, rollouts)
+    return results
+
+
+SOLVE_FIELDS = ["name", "board", "move", "direction", "time_ms"]
+
+
+def solve_position(engine, rollouts, policy, depth, time_limit, allocation, rollout_depth, weights, heuristic_weights,
+                   position):
+    # best move for one position in a worker process, position is (name, bitboard, seed); the engine plays its
+    # move on a headless game of the position, the move is None if the game is already over
+    name, board, seed = position
+    start = time.time()
+    game = Game.from_snapshot((board, 0), random.Random(seed))
+    move = None
+    if game.legal_moves():
+        search = make_engine(engine, rollouts, policy, seed, None, depth, time_limit, allocation, rollout_depth,
+                             weights, heuristic_weights)
+        move = search(game)
+    return {"name": name, "board": format(board, "#018x"), "move": move,
+            "direction": get_direction_text(move) if move is not None else "",
+            "time_ms": round(1000 * (time.time() - start), 3)}
+
+
+def solve(path, out=None, output_format="jsonl", engine="mcts", rollouts=50, policy="random", workers=None, seed=0,
+          depth=2, time_limit=None, allocation="uniform", rollout_depth=None, weights=None, heuristic_weights=None):
+    # best move for every position of a .2048 file or directory (see positions.py) on a process pool,
+    # results are written to out (stdout by default) as JSON lines or CSV, in the order of the positions,
+    # as soon as they are known; position i is searched with seed + i
+    import csv
+    import json
+    from concurrent.futures import ProcessPoolExecutor
+
+    import positions
+
+    init_time = time.time()
+    # bad input (a malformed position file, a missing or damaged weight file) fails before the workers start
+    try:
+        if weights:
+            import weights as weight_file
+
+            weight_file.verify(weights)
+        items = [(name, board, seed + i) for i, (name, board) in enumerate(positions.load_positions(path))]
+    except (ValueError, OSError) as e:
+        raise SystemExit("error: " + str(e)) from None
+    solver = functools.partial(solve_position, engine, rollouts, policy, depth, time_limit, allocation, rollout_depth,
+                               weights, heuristic_weights)
+
+    stream = open(out, "w", newline="") if out else sys.stdout
+    try:
+        if output_format == "csv":
+            writer = csv.DictWriter(stream, SOLVE_FIELDS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(result):
+                stream.write(json.dumps(result) + "\n")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # a single search is short, so the positions go to the workers in chunks to save on messages
+            chunksize = max(1, len(items) // (4 * (workers or os.cpu_count() or 1)))
+            for result in pool.map(solver, items, chunksize=chunksize):
+                write(result)
+            stream.flush()
+    finally:
+        if out:
+            stream.close()
+
+    elapsed = time.time() - init_time
+    print("Solved " + str(len(items)) + " positions in " + str(round(elapsed, 1)) + " s (" +
+          str(round(60 * len(items) / max(elapsed, 1e-9))) + " per minute)", file=sys.stderr)
+
+
+def import_time(module="newgame", repeat=5):
+    # cold import time of a module in ms, the median over fresh interpreters (after one run that fills the
+    # table caches), and whether importing it loaded pygame
+    import subprocess
+
+    code = ("import sys, time\nstart = time.perf_counter()\nimport " + module +
+            "\nprint(1000 * (time.perf_counter() - start), 'pygame' in sys.modules)")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    loaded = False
+    for run in range(repeat + 1):
+        output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True,
+                                check=True).stdout.split()
+        if run:
+            times.append(float(output[0]))
+        loaded = loaded or output[1] == "True"
+    return sorted(times)[len(times) // 2], loaded
+
+
+def add_engine_arguments(parser):
+    # search options shared by bench and solve
+    parser.add_argument("--engine", choices=ENGINES, default="mcts", help="search used to pick the moves")
+    parser.add_argument("--rollouts", type=int, default=50,
+                        help="rollouts per move for mcts (uct: iterations per move, including reused ones)")
+    parser.add_argument("--depth", type=int, default=2, help="search depth in moves for expectimax")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="MS",
+                        help="per-move time budget for mcts and uct, --rollouts is then only an upper bound")
+    parser.add_argument("--allocation", choices=ALLOCATIONS, default="uniform",
+                        help="how mcts spreads its rollouts (rollouts x legal moves) over the moves")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random", help="rollout policy")
+    parser.add_argument("--rollout-depth", type=int, default=None, metavar="K",
+                        help="cut mcts rollouts off after K moves and score the leaf with heuristics.evaluate")
+    parser.add_argument("--weights", default=None, metavar="FILE",
+                        help="n-tuple network from `train`, evaluator for expectimax and --rollout-depth")
+    parser.add_argument("--heuristic-weights", default=None, metavar="F=W,...",
+                        help="static heuristic with these feature weights (empty, merges, monotonicity, sum) "
+                             "as the evaluator for expectimax and --rollout-depth")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+
+
+def engine_options(args):
+    # (time limit in seconds, heuristic weights) from the parsed engine arguments
+    time_limit = None if args.time_limit is None else args.time_limit / 1000
+    # fail on options the engine cannot use before starting the workers
+    try:
+        check_engine_options(args.engine, args.policy, True if getattr(args, "table", 0) else None, time_limit,
+                             args.allocation, args.rollout_depth)
+    except ValueError as e:
+        raise SystemExit("error: " + str(e)) from None
+    heuristic_weights = None
+    if args.heuristic_weights:
+        import heuristics
+
+        heuristic_weights = heuristics.parse_weights(args.heuristic_weights)
+        # fail on unknown features before starting the workers
+        heuristics.Heuristic(heuristic_weights)
+    return time_limit, heuristic_weights
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m newgame")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = commands.add_parser("bench", help="play many games with mcts and report score and tile statistics")
+    add_engine_arguments(bench_parser)
+    bench_parser.add_argument("--games", type=int, default=25)
+    bench_parser.add_argument("--seed", type=int, default=0, help="seed of the first game, game i uses seed + i")
+    bench_parser.add_argument("--table", type=int, default=0, metavar="MB",
+                              help="transposition table size in MB for the mcts engine (0: no table)")
+    bench_parser.add_argument("--share-table", action="store_true",
+                              help="keep the transposition table of a worker across the games it plays")
+    bench_parser.add_argument("--symmetric", action="store_true",
+                              help="store one transposition table entry for all 8 rotations/reflections of a board")
+    bench_parser.add_argument("--record", default=None, metavar="FILE",
+                              help="write every move of every game to a compressed game record file (see records.py)")
+    bench_parser.add_argument("--stats", default=None, metavar="FILE",
+                              help="count slides, spawns, game over checks, clones and rollouts and time the decisions "
+                                   "and rollouts (see stats.py); one JSON line per game, then the total")
+
+    solve_parser = commands.add_parser("solve", help="best move for every position of .2048 files, as CSV or JSONL")
+    solve_parser.add_argument("path", help="a .2048 file (one or more positions) or a directory of .2048 files")
+    add_engine_arguments(solve_parser)
+    solve_parser.add_argument("--seed", type=int, default=0, help="seed of the first position, position i uses seed + i")
+    solve_parser.add_argument("--out", default=None, metavar="FILE", help="where to write the results (default: stdout)")
+    solve_parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                              help="output format (default: csv if --out ends with .csv, jsonl otherwise)")
+
+    train_parser = commands.add_parser("train", help="train an n-tuple network evaluator by TD(0) self-play")
+    train_parser.add_argument("--games", type=int, default=10000)
+    train_parser.add_argument("--tuples", type=int, choices=[4, 6], default=4,
+                              help="tuple layout: 4 (4 x 4-tuples, 1 MB) or 6 (4 x 6-tuples, 256 MB)")
+    train_parser.add_argument("--alpha", type=float, default=0.1, help="learning rate")
+    train_parser.add_argument("--seed", type=int, default=0)
+    train_parser.add_argument("--report", type=int, default=100, help="print the average score every N games")
+    train_parser.add_argument("--resume", default=None, metavar="FILE", help="continue training these weights")
+    train_parser.add_argument("--out", default="weights.bin", metavar="FILE", help="where to write the weights")
+
+    play_parser = commands.add_parser("play", help="play in a window, with optional AI suggestions and autoplay")
+    play_parser.add_argument("file", nargs="?", default=None, help="start from this .2048 position")
+    play_parser.add_argument("--assist", action="store_true", help="show the move suggested by the AI")
+    play_parser.add_argument("--autoplay", action="store_true", help="let the AI play (A switches it on and off)")
+    play_parser.add_argument("--engine", choices=ENGINES, default="expectimax", help="search used by the AI")
+    play_parser.add_argument("--rollouts", type=int, default=50)
+    play_parser.add_argument("--depth", type=int, default=2)
+    play_parser.add_argument("--policy", choices=sorted(POLICIES), default="random", help="rollout policy")
+    play_parser.add_argument("--seed", type=int, default=None)
+    play_parser.add_argument("--fps", type=int, default=60, help="frame rate cap of the window")
+
+    import_parser = commands.add_parser("import-time", help="measure the cold import time of the engine")
+    import_parser.add_argument("--module", default="newgame")
+    import_parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to time")
+    import_parser.add_argument("--max-ms", type=float, default=None,
+                               help="exit with an error if the median import time is above this")
+
+    args = parser.parse_args(argv)
+    if args.command == "bench":
+        time_limit, heuristic_weights = engine_options(args)
+        bench(args.games, args.rollouts, args.policy, args.workers, args.seed, args.engine, args.table, args.share_table,
+              args.symmetric, args.depth, time_limit, args.allocation, args.rollout_depth, args.weights,
+              heuristic_weights, args.record, args.stats)
+    elif args.command == "solve":
+        time_limit, heuristic_weights = engine_options(args)
+        output_format = args.format or ("csv" if args.out and args.out.endswith(".csv") else "jsonl")
+        solve(args.path, args.out, output_format, args.engine, args.rollouts, args.policy, args.workers, args.seed,
+              args.depth, time_limit, args.allocation, args.rollout_depth, args.weights, heuristic_weights)
+    elif args.command == "play":
+        try:
+            check_engine_options(args.engine, args.policy)
+        except ValueError as e:
+            raise SystemExit("error: " + str(e)) from None
+        play_gui(args.file, args.assist, args.autoplay, args.engine, args.rollouts, args.policy, args.depth, args.seed,
+                 args.fps)
+    elif args.command == "import-time":
+        median, loaded = import_time(args.module, args.repeat)
+        print("import " + args.module + ": " + str(round(median, 1)) + " ms (median of " + str(args.repeat) +
+              " runs)" + (", loads pygame" if loaded else ""))
+        if loaded or (args.max_ms is not None and median > args.max_ms):
+            sys.exit(1)
+    elif args.command == "train":
+        import ntuple
+
+        if args.resume:
+            network = ntuple.NTupleNetwork.load(args.resume, mode="c")
+        else:
+            network = ntuple.NTupleNetwork(ntuple.LAYOUTS[args.tuples])
+        ntuple.train(network, args.games, args.alpha, random.Random(args.seed), args.report)
+        network.save(args.out)
+        print("Weights written to " + args.out)
+
+
+if __name__ == "__main__":
+    main()
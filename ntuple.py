@@ -0,0 +1,128 @@
+import random
+
+import numpy as np
+
+import bitboard
+import symmetry
+import weights
+
+# N-tuple network value function on bitboards.
+# A tuple is a fixed group of cells; the tile exponents on those cells, read as a base-16 number, index a table of
+# weights. The value of a board is the sum of the weights picked by every tuple under all 8 symmetries of the board,
+# so one table learns a pattern wherever it shows up on the board.
+# The network estimates the points still to be gained from an afterstate (the board right after a move, before the
+# random tile) and is trained by TD(0) on self-play games (Szubert and Jaskowski, 2014).
+# Cells are numbered like bitboard.empty_cells: cell 4 * i + j is row i, column j.
+
+# two rows and two 2x2 squares, 4 x 65536 weights
+TUPLES_4 = [(0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 4, 5), (4, 5, 8, 9)]
+# the 4 x 6-tuple network of Wu et al., 4 x 16^6 weights (256 MB as float32), stronger but slow to train in Python
+TUPLES_6 = [(0, 1, 2, 3, 4, 5), (4, 5, 6, 7, 8, 9), (0, 1, 2, 4, 5, 6), (4, 5, 6, 8, 9, 10)]
+LAYOUTS = {4: TUPLES_4, 6: TUPLES_6}
+
+
+def _cell_map(t):
+    # cell k of a board ends up in cell_map[k] of symmetry.transform(board, t)
+    return [(symmetry.transform(1 << (4 * k), t).bit_length() - 1) >> 2 for k in range(16)]
+
+
+CELL_MAPS = [_cell_map(t) for t in range(8)]
+
+
+# shift of every cell in a bitboard
+CELL_SHIFTS = np.arange(0, 64, 4, dtype=np.uint64)
+
+
+class NTupleNetwork:
+    def __init__(self, tuples=TUPLES_4, table=None):
+        # table: optional flat float32 array with the weights of all the tuples one after the other
+        self.tuples = [tuple(cells) for cells in tuples]
+        sizes = [16 ** len(cells) for cells in self.tuples]
+        self.table = table if table is not None else np.zeros(sum(sizes), dtype=np.float32)
+        offsets = np.cumsum([0] + sizes)
+
+        # every tuple under every symmetry is one feature, duplicates of symmetric tuples are kept
+        # so every tuple contributes the same number of features; shorter tuples are padded with
+        # a 17th cell that is always empty
+        length = max(len(cells) for cells in self.tuples)
+        features = [(i, [CELL_MAPS[t][k] for k in cells] + [16] * (length - len(cells)))
+                    for i, cells in enumerate(self.tuples) for t in range(8)]
+        self.feature_cells = np.array([cells for i, cells in features], dtype=np.intp)
+        self.feature_offsets = np.array([offsets[i] for i, cells in features], dtype=np.int64)
+        self.nibble_shifts = np.arange(0, 4 * length, 4, dtype=np.uint64)
+
+    def indices(self, boards):
+        # (number of boards, number of features) array of positions in the flat table
+        boards = np.array(boards, dtype=np.uint64)
+        nibbles = np.zeros((len(boards), 17), dtype=np.uint64)
+        nibbles[:, :16] = (boards[:, None] >> CELL_SHIFTS) & np.uint64(0xF)
+        index = (nibbles[:, self.feature_cells] << self.nibble_shifts).sum(axis=2, dtype=np.uint64)
+        return index.astype(np.int64) + self.feature_offsets
+
+    def evaluate_many(self, boards):
+        return self.table[self.indices(boards)].sum(axis=1, dtype=np.float64)
+
+    def evaluate(self, board):
+        return float(self.evaluate_many([board])[0])
+
+    def update(self, board, delta):
+        # moves the value of the board by delta, shared out over all its features
+        np.add.at(self.table, self.indices([board])[0], delta / len(self.feature_offsets))
+
+    def save(self, path):
+        weights.write(path, self.tuples, self.table)
+
+    @staticmethod
+    def load(path, mode="r", verify=True):
+        # the table stays memory-mapped (see weights.py): "r" to evaluate, "c" to keep training in memory
+        tuples, table = weights.read(path, mode, verify)
+        return NTupleNetwork(tuples, table)
+
+
+def best_afterstate(network, board):
+    # greedy move on the network: (move, afterstate, reward, value of the afterstate) with the highest
+    # reward + value, None if the game is over; the legal afterstates are evaluated in one batch
+    candidates = []
+    for move in range(4):
+        after, reward, changed = bitboard.slide(board, move)
+        if changed:
+            candidates.append((move, after, reward))
+    if not candidates:
+        return None
+    values = network.evaluate_many([after for move, after, reward in candidates])
+    best = max(range(len(candidates)), key=lambda c: candidates[c][2] + values[c])
+    return candidates[best] + (float(values[best]),)
+
+
+def learn_game(network, alpha=0.1, rng=random):
+    # plays one greedy self-play game and applies the TD(0) update to every afterstate, returns (score, max tile)
+    board = bitboard.spawn(bitboard.spawn(0, rng), rng)
+    score = 0
+    previous = None
+    while True:
+        best = best_afterstate(network, board)
+        if best is None:
+            break
+        move, after, reward, value = best
+        if previous is not None:
+            # the value of the previous afterstate should be the reward of this move plus the value after it
+            network.update(previous, alpha * (reward + value - network.evaluate(previous)))
+        previous = after
+        score += reward
+        board = bitboard.spawn(after, rng)
+    if previous is not None:
+        # nothing more can be gained once the game is over
+        network.update(previous, -alpha * network.evaluate(previous))
+    return score, bitboard.max_tile(board)
+
+
+def train(network, games, alpha=0.1, rng=random, report=100):
+    # TD(0) self-play training, prints the average score of every `report` games
+    scores = []
+    for game in range(1, games + 1):
+        score, top = learn_game(network, alpha, rng)
+        scores.append(score)
+        if report and game % report == 0:
+            print("Games " + str(game) + "/" + str(games) + ": average score " +
+                  str(sum(scores[-report:]) / report), flush=True)
+    return scores
@@ -0,0 +1,53 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from newgame import rollout_batch
+
+
+def _run_batch(policy, snapshot, count, seed):
+    # runs in a worker process, every batch gets its own random stream so the result does not depend
+    # on which worker picks it up or on what that worker ran before
+    return rollout_batch(policy, snapshot, count, random.Random(seed))
+
+
+class RolloutExecutor:
+    # Persistent pool of worker processes for mcts rollouts.
+    # The pool is created once and reused for every move of every game, pass it to mcts(..., executor=...)
+    # and call close() (or use it as a context manager) when done.
+    def __init__(self, workers=None, seed=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # the batch seeds are drawn from this generator, so the same seed and number of workers
+        # replays the same rollouts
+        self.rng = random.Random(seed)
+
+    def run(self, policy, snapshots, count):
+        # runs `count` rollouts of `policy` from every afterstate snapshot (see rollout_batch), returns the summed scores per snapshot
+        # count is either one number for all the snapshots or a list with one number per snapshot
+        if not snapshots:
+            return []
+
+        counts = count if isinstance(count, list) else [count] * len(snapshots)
+        futures = []
+        for snapshot, count in zip(snapshots, counts):
+            # split every snapshot's rollouts into enough batches to keep all the workers busy
+            batches = min(count, max(1, math.ceil(self.workers / len(snapshots))))
+            jobs = []
+            for b in range(batches):
+                size = count // batches + (1 if b < count % batches else 0)
+                seed = self.rng.getrandbits(64)
+                jobs.append(self.pool.submit(_run_batch, policy, snapshot, size, seed))
+            futures.append(jobs)
+
+        return [sum(job.result() for job in jobs) for jobs in futures]
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,50 @@
+import os
+
+# Position files (.2048, see AI/1.2048): the tile values of a grid, one row per line, 0 for an empty cell.
+# A file can hold any number of positions one after the other (blank lines between them are optional) and a
+# directory stands for all the .2048 files in it. A file is parsed in one go: all its numbers are read at once and
+# every 16 of them make a bitboard (see bitboard.py).
+
+EXTENSION = ".2048"
+# tile value as written in a file -> exponent
+EXPONENTS = {"0": 0}
+EXPONENTS.update({str(2 ** e): e for e in range(1, 16)})
+
+
+def parse_positions(text, name="<positions>"):
+    # bitboards of all the positions in text
+    tiles = text.split()
+    try:
+        values = [EXPONENTS[tile] for tile in tiles]
+    except KeyError as e:
+        raise ValueError(name + ": invalid tile " + str(e)) from None
+    if len(values) % 16:
+        raise ValueError(name + ": " + str(len(values)) + " tiles, not a whole number of 4x4 positions")
+    boards = []
+    for start in range(0, len(values), 16):
+        board = 0
+        for k in range(16):
+            board |= values[start + k] << (4 * k)
+        boards.append(board)
+    return boards
+
+
+def position_files(path):
+    # the position files behind a path: the .2048 files of a directory (sorted) or the file itself
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(EXTENSION)]
+    return [path]
+
+
+def load_positions(path):
+    # [(name, bitboard)] for every position of a file or directory, the name is the file name,
+    # followed by ":index" (from 1) when the file holds more than one position
+    positions = []
+    for file in position_files(path):
+        with open(file, "r") as f:
+            boards = parse_positions(f.read(), file)
+        if len(boards) == 1:
+            positions.append((file, boards[0]))
+        else:
+            positions.extend((file + ":" + str(i + 1), board) for i, board in enumerate(boards))
+    return positions
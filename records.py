@@ -0,0 +1,126 @@
+import gzip
+import struct
+
+import bitboard
+
+# Compact binary game records.
+# A record file is a gzip stream: the magic and version, then for every game a GAME entry, one MOVE entry per move
+# and an END entry. Every entry starts with its type byte (little endian, fixed size per type):
+#   GAME  seed (int64), starting board (uint64)
+#   MOVE  board before the move (uint64), move (uint8), spawn (uint8), score after the move (uint32)
+#   END   final board (uint64), final score (uint32)
+# The spawn byte is 2 * cell + (exponent - 1) of the tile added after the move (cell = 4 * row + column),
+# NO_SPAWN if the move did not add one. Boards are bitboards (see bitboard.py).
+
+MAGIC = b"2048REC\0"
+VERSION = 1
+GAME, MOVE, END = 1, 2, 3
+ENTRIES = {
+    GAME: struct.Struct("<qQ"),
+    MOVE: struct.Struct("<QBBI"),
+    END: struct.Struct("<QI"),
+}
+NO_SPAWN = 0xFF
+
+
+def encode_spawn(afterstate, board):
+    # spawn byte of the tile that turned the afterstate (the board right after the move) into board
+    added = board ^ afterstate
+    if not added:
+        return NO_SPAWN
+    cell = (added.bit_length() - 1) >> 2
+    return 2 * cell + (added >> (4 * cell)) - 1
+
+
+def decode_spawn(spawn):
+    # (cell, tile value) or None
+    if spawn == NO_SPAWN:
+        return None
+    return spawn >> 1, 2 ** ((spawn & 1) + 1)
+
+
+class RecordWriter:
+    # Writes records through gzip's buffered stream, so nothing has to be kept in memory between games.
+    def __init__(self, path, compresslevel=6):
+        self.file = gzip.open(path, "wb", compresslevel=compresslevel)
+        self.file.write(MAGIC + struct.pack("<H", VERSION))
+
+    def _write(self, kind, *values):
+        self.file.write(bytes((kind,)) + ENTRIES[kind].pack(*values))
+
+    def start_game(self, seed, board):
+        self._write(GAME, seed, board)
+
+    def move(self, board, move, spawn, score):
+        self._write(MOVE, board, move, spawn, score)
+
+    def end_game(self, board, score):
+        self._write(END, board, score)
+
+    def write_game(self, seed, board, moves, final_board, score):
+        # moves: (board before the move, move, spawn, score after the move) for every move
+        self.start_game(seed, board)
+        for entry in moves:
+            self.move(*entry)
+        self.end_game(final_board, score)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_games(path):
+    # lazily yields one dict per game: seed, board (starting board), moves (list of
+    # (board, move, spawn, score) tuples), final_board and score
+    with gzip.open(path, "rb") as f:
+        header = f.read(len(MAGIC) + 2)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(path + ": not a game record file")
+        version = struct.unpack("<H", header[len(MAGIC):])[0]
+        if version != VERSION:
+            raise ValueError(path + ": unsupported record version " + str(version))
+
+        game = None
+        while True:
+            kind = f.read(1)
+            if not kind:
+                break
+            kind = kind[0]
+            if kind not in ENTRIES:
+                raise ValueError(path + ": corrupt record (entry type " + str(kind) + ")")
+            data = f.read(ENTRIES[kind].size)
+            if len(data) < ENTRIES[kind].size:
+                raise ValueError(path + ": truncated record")
+            values = ENTRIES[kind].unpack(data)
+            if kind == GAME:
+                game = {"seed": values[0], "board": values[1], "moves": []}
+            elif game is None:
+                raise ValueError(path + ": move outside of a game")
+            elif kind == MOVE:
+                game["moves"].append(values)
+            else:
+                game["final_board"], game["score"] = values
+                yield game
+                game = None
+
+
+def replay(game):
+    # checks a record against the game rules: every move must lead to the next recorded board
+    board = game["board"]
+    score = 0
+    for recorded, move, spawn, recorded_score in game["moves"]:
+        if recorded != board:
+            return False
+        after, gained, changed = bitboard.slide(board, move)
+        score += gained
+        if not changed or score != recorded_score:
+            return False
+        board = after
+        if spawn != NO_SPAWN:
+            board |= ((spawn & 1) + 1) << (4 * (spawn >> 1))
+    return board == game["final_board"] and score == game["score"]
@@ -0,0 +1,81 @@
+import bitboard
+
+# The 8 symmetries of the board (4 rotations and their reflections) on bitboards.
+# Transform t (0..7) transposes the board if t & 4, then mirrors it left/right if t & 1 and top/bottom if t & 2.
+# A move m on a board is the same as move MOVE_MAP[t][m] on the transformed board,
+# so values stored for the canonical board can be translated back to the original orientation.
+
+IDENTITY = 0
+
+
+def flip_horizontal(board):
+    # mirror left/right: reverse the 4 nibbles of every row
+    board = ((board & 0xF0F0F0F0F0F0F0F0) >> 4) | ((board & 0x0F0F0F0F0F0F0F0F) << 4)
+    return ((board & 0xFF00FF00FF00FF00) >> 8) | ((board & 0x00FF00FF00FF00FF) << 8)
+
+
+def flip_vertical(board):
+    # mirror top/bottom: reverse the order of the rows
+    board = ((board & 0xFFFF0000FFFF0000) >> 16) | ((board & 0x0000FFFF0000FFFF) << 16)
+    return ((board & 0xFFFFFFFF00000000) >> 32) | ((board & 0x00000000FFFFFFFF) << 32)
+
+
+def transform(board, t):
+    if t & 4:
+        board = bitboard.transpose(board)
+    if t & 1:
+        board = flip_horizontal(board)
+    if t & 2:
+        board = flip_vertical(board)
+    return board
+
+
+def untransform(board, t):
+    # inverse of transform(board, t)
+    if t & 2:
+        board = flip_vertical(board)
+    if t & 1:
+        board = flip_horizontal(board)
+    if t & 4:
+        board = bitboard.transpose(board)
+    return board
+
+
+def _move_map(t):
+    moves = []
+    for m in range(4):
+        if t & 4:
+            m = {bitboard.UP: bitboard.LEFT, bitboard.LEFT: bitboard.UP,
+                 bitboard.RIGHT: bitboard.DOWN, bitboard.DOWN: bitboard.RIGHT}[m]
+        if t & 1:
+            m = {bitboard.LEFT: bitboard.RIGHT, bitboard.RIGHT: bitboard.LEFT}.get(m, m)
+        if t & 2:
+            m = {bitboard.UP: bitboard.DOWN, bitboard.DOWN: bitboard.UP}.get(m, m)
+        moves.append(m)
+    return tuple(moves)
+
+
+MOVE_MAP = tuple(_move_map(t) for t in range(8))
+
+
+def canonical(board):
+    # the smallest of the 8 symmetric boards, and the transform that maps board onto it
+    best, best_t = board, IDENTITY
+    for t in range(1, 8):
+        candidate = transform(board, t)
+        if candidate < best:
+            best, best_t = candidate, t
+    return best, best_t
+
+
+def to_canonical(values, t):
+    # per-move values in the original orientation -> the same values indexed by the moves of the transformed board
+    result = list(values)
+    for m in range(4):
+        result[MOVE_MAP[t][m]] = values[m]
+    return result
+
+
+def to_original(values, t):
+    # per-move values of the transformed board -> the same values indexed by the moves of the original board
+    return [values[MOVE_MAP[t][m]] for m in range(4)]
@@ -0,0 +1,46 @@
+import os
+from array import array
+
+# Disk cache for lookup tables that are slow to compute in Python (the row tables of bitboard.py, the feature
+# tables of heuristics.py). Every set of tables is one binary file in __pycache__ next to the modules, the arrays
+# one after the other; the file name carries a version number that is bumped whenever the tables change, so a
+# stale file is never read. Loading a file takes a few milliseconds. If __pycache__ cannot be written (read-only
+# checkout) the tables are simply computed again by every process.
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+
+def cache_file(name, version):
+    return os.path.join(DIRECTORY, name + "-" + str(version) + ".bin")
+
+
+def load(name, version, layout, compute):
+    # layout: [(table, array typecode, length)], compute(): {table: sequence of numbers}
+    # returns {table: array}, read from the cache file or computed and written to it
+    path = cache_file(name, version)
+    try:
+        with open(path, "rb") as f:
+            tables = {}
+            for table, typecode, length in layout:
+                tables[table] = array(typecode)
+                tables[table].fromfile(f, length)
+        return tables
+    except (OSError, EOFError):
+        pass
+
+    computed = compute()
+    tables = {table: array(typecode, computed[table]) for table, typecode, length in layout}
+    # written under a temporary name and moved into place, so other processes never read a partial file
+    temporary = path + "." + str(os.getpid()) + ".tmp"
+    try:
+        os.makedirs(DIRECTORY, exist_ok=True)
+        with open(temporary, "wb") as f:
+            for table, typecode, length in layout:
+                tables[table].tofile(f)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+    return tables
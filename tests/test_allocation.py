@@ -0,0 +1,55 @@
+import random
+
+import newgame
+from newgame import Game, legal_afterstates, mcts, random_policy, successive_halving, ucb_allocation
+
+
+def midgame(seed, moves=60):
+    # a position some random moves into a game
+    game = Game(gui=False, rng=random.Random(seed))
+    for _ in range(moves):
+        if game.check_game_over():
+            break
+        game.play(game.rng.getrandbits(2))
+    return game
+
+
+def test_successive_halving_stays_within_its_budget():
+    for seed in range(20):
+        game = midgame(seed)
+        moves, afterstates = legal_afterstates(game)
+        if len(moves) < 2:
+            continue
+        for budget in (len(moves), 5, 8, 13, 40, 100):
+            if budget < len(moves):
+                continue
+            totals, counts, alive = successive_halving(random_policy, afterstates, budget, rng=game.rng)
+            assert sum(counts) <= budget
+            assert len(alive) == 1
+            assert all(counts[i] > 0 for i in range(len(moves)))
+            # the survivor has the best average of the moves that played the last round
+            best = alive[0]
+            assert all(totals[best] / counts[best] >= totals[i] / counts[i]
+                       for i in range(len(moves)) if counts[i] == counts[best])
+
+
+def test_ucb_allocation_spends_its_budget():
+    game = midgame(1)
+    moves, afterstates = legal_afterstates(game)
+    totals, counts, alive = ucb_allocation(random_policy, afterstates, 40, rng=game.rng)
+    assert sum(counts) == 40
+    assert all(counts)
+    assert alive == list(range(len(moves)))
+
+
+def test_mcts_allocations_play_legal_moves():
+    rng = random.Random(5)
+    for allocation in newgame.ALLOCATIONS:
+        for seed in range(30):
+            # a late position has few legal moves, a forced move must be played too
+            game = midgame(seed, rng.randint(0, 150))
+            if game.check_game_over():
+                continue
+            legal = game.legal_moves()
+            move = mcts(game, 3, verbose=False, allocation=allocation)
+            assert (legal >> move) & 1
@@ -0,0 +1,99 @@
+import random
+
+import bitboard
+
+
+def old_slide_line(line):
+    # the list based move loop the bitboard replaced, for one line (index 0 is the side the tiles move to):
+    # every tile shifts over the empty cells before it and merges once with an equal, unmerged neighbour
+    line = line[:]
+    merged = [False] * 4
+    score = 0
+    for j in range(4):
+        shift = 0
+        for k in range(j):
+            if line[k] == 0:
+                shift += 1
+        if shift:
+            line[j - shift] = line[j]
+            line[j] = 0
+        if j - shift - 1 >= 0 and line[j - shift - 1] == line[j - shift] and not merged[j - shift - 1] and \
+                not merged[j - shift]:
+            score += line[j - shift] * 2
+            line[j - shift - 1] *= 2
+            line[j - shift] = 0
+            merged[j - shift - 1] = True
+    return line, score
+
+
+# cells of every line in the order the tiles move, per direction (up, right, down, left)
+LINES = [
+    [[(i, j) for i in range(4)] for j in range(4)],
+    [[(i, j) for j in range(3, -1, -1)] for i in range(4)],
+    [[(i, j) for i in range(3, -1, -1)] for j in range(4)],
+    [[(i, j) for j in range(4)] for i in range(4)],
+]
+
+
+def old_move(grid, direction):
+    grid = [row[:] for row in grid]
+    score = 0
+    for cells in LINES[direction]:
+        line, gained = old_slide_line([grid[i][j] for i, j in cells])
+        score += gained
+        for (i, j), value in zip(cells, line):
+            grid[i][j] = value
+    return grid, score
+
+
+def random_grid(rng):
+    # mostly small tiles and empty cells so that merges are common; no 32768, which the bitboard never merges
+    return [[rng.choice([0, 0, 0, 2, 2, 4, 4, 8, 16, 2 ** rng.randint(1, 14)]) for _ in range(4)] for _ in range(4)]
+
+
+def test_slide_matches_old_move_loop():
+    rng = random.Random(0)
+    for _ in range(5000):
+        grid = random_grid(rng)
+        board = bitboard.to_board(grid)
+        for direction in range(4):
+            expected, expected_score = old_move(grid, direction)
+            after, score, changed = bitboard.slide(board, direction)
+            assert bitboard.to_grid(after) == expected
+            assert score == expected_score
+            assert changed == (expected != grid)
+
+
+def test_legal_moves_match_slide():
+    rng = random.Random(1)
+    for _ in range(5000):
+        board = bitboard.to_board(random_grid(rng))
+        mask = bitboard.legal_moves(board)
+        for direction in range(4):
+            assert bool((mask >> direction) & 1) == bitboard.slide(board, direction)[2]
+        assert bitboard.is_game_over(board) == (mask == 0)
+
+
+def test_grid_round_trip_and_max_tile():
+    rng = random.Random(2)
+    for _ in range(1000):
+        grid = random_grid(rng)
+        board = bitboard.to_board(grid)
+        assert bitboard.to_grid(board) == grid
+        assert bitboard.max_tile(board) == max(max(row) for row in grid)
+
+
+def test_spawn_adds_one_tile_on_an_empty_cell():
+    rng = random.Random(3)
+    for _ in range(1000):
+        board = bitboard.to_board(random_grid(rng))
+        cells = bitboard.empty_cells(board)
+        spawned = bitboard.spawn(board, rng)
+        if not cells:
+            assert spawned == board
+            continue
+        added = spawned ^ board
+        cell = (added.bit_length() - 1) >> 2
+        assert cell in cells
+        assert added >> (4 * cell) in (1, 2)
+        assert added == (added >> (4 * cell)) << (4 * cell)
@@ -0,0 +1,68 @@
+import gzip
+
+import pytest
+
+import newgame
+import records
+
+
+def recorded_game(seed):
+    # a short real game, expectimax at depth 1 is the fastest engine
+    result = newgame.play_benchmark_game("expectimax", "random", 1, seed, depth=1, record=True)
+    return result, result.pop("record")
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games.rec")
+    games = [recorded_game(seed) for seed in (1, 2)]
+    with records.RecordWriter(path) as writer:
+        for result, game in games:
+            writer.write_game(result["seed"], game["board"], game["moves"], game["final_board"], result["score"])
+
+    read = list(records.read_games(path))
+    assert len(read) == len(games)
+    for (result, game), entry in zip(games, read):
+        assert entry["seed"] == result["seed"]
+        assert entry["board"] == game["board"]
+        assert entry["moves"] == [tuple(move) for move in game["moves"]]
+        assert entry["final_board"] == game["final_board"]
+        assert entry["score"] == result["score"]
+        assert records.replay(entry)
+
+
+def test_replay_rejects_a_changed_move(tmp_path):
+    result, game = recorded_game(3)
+    game["seed"], game["score"] = result["seed"], result["score"]
+    board, move, spawn, score = game["moves"][0]
+    game["moves"][0] = (board, move, spawn, score + 2)
+    assert not records.replay(game)
+
+
+def test_spawn_encoding():
+    for cell in range(16):
+        for exponent in (1, 2):
+            byte = records.encode_spawn(0, exponent << (4 * cell))
+            assert records.decode_spawn(byte) == (cell, 2 ** exponent)
+    assert records.encode_spawn(0x12, 0x12) == records.NO_SPAWN
+    assert records.decode_spawn(records.NO_SPAWN) is None
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = str(tmp_path / "other.rec")
+    with gzip.open(path, "wb") as f:
+        f.write(b"not a record")
+    with pytest.raises(ValueError):
+        list(records.read_games(path))
+
+
+def test_read_rejects_a_truncated_record(tmp_path):
+    path = str(tmp_path / "games.rec")
+    result, game = recorded_game(4)
+    with records.RecordWriter(path) as writer:
+        writer.write_game(result["seed"], game["board"], game["moves"], game["final_board"], result["score"])
+    with gzip.open(path, "rb") as f:
+        data = f.read()
+    with gzip.open(path, "wb") as f:
+        f.write(data[:-3])
+    with pytest.raises(ValueError):
+        list(records.read_games(path))
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+import newgame
+import positions
+
+
+def test_positions_of_a_file(tmp_path):
+    path = tmp_path / "two.2048"
+    path.write_text("2 0 0 0\n0 0 0 0\n0 0 0 0\n0 0 0 4\n\n0 0 0 0\n0 8 0 0\n0 0 0 0\n0 0 0 0\n")
+    assert positions.load_positions(str(path)) == [(str(path) + ":1", 1 | 2 << 60), (str(path) + ":2", 3 << 20)]
+
+
+@pytest.mark.parametrize("text", ["2 0 0 0\n0 0 0 0\n0 0 0 0\n0 0 0\n", "3 0 0 0\n0 0 0 0\n0 0 0 0\n0 0 0 0\n"])
+def test_malformed_positions_are_a_command_line_error(tmp_path, text):
+    path = tmp_path / "bad.2048"
+    path.write_text(text)
+    with pytest.raises(SystemExit, match="^error: .*bad.2048"):
+        newgame.main(["solve", str(path), "--workers", "1"])
+
+
+def test_missing_file_is_a_command_line_error(tmp_path):
+    with pytest.raises(SystemExit, match="^error: "):
+        newgame.main(["solve", str(tmp_path / "missing.2048"), "--workers", "1"])
+
+
+def test_solve(tmp_path, capsys):
+    path = tmp_path / "one.2048"
+    path.write_text("2 2 0 0\n0 0 0 0\n0 0 0 0\n0 0 0 0\n")
+    newgame.main(["solve", str(path), "--rollouts", "2", "--workers", "1"])
+    result = json.loads(capsys.readouterr().out)
+    assert result["name"] == str(path)
+    assert result["board"] == format(0x11, "#018x")
+    assert result["move"] in (0, 1, 2, 3)
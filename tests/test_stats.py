@@ -0,0 +1,36 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import newgame
+import stats
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_hooks_count_an_mcts_decision():
+    stats.enable()
+    try:
+        newgame.mcts(newgame.Game(gui=False, rng=random.Random(0)), 5, verbose=False)
+        counters = stats.STATS.raw()["counters"]
+        seconds = stats.STATS.raw()["seconds"]
+    finally:
+        stats.disable()
+    assert counters["rollouts"] > 0
+    assert counters["mcts_allocation"] == 1
+    assert counters["mcts_afterstates"] == 1
+    assert seconds["mcts_allocation"] > 0
+
+
+def test_hooks_reach_the_engine_run_as_a_script(tmp_path):
+    # python newgame.py runs the engine as __main__ without a module spec, the hooks have to land on that copy
+    path = str(tmp_path / "stats.jsonl")
+    subprocess.run([sys.executable, "newgame.py", "bench", "--games", "1", "--rollouts", "2", "--workers", "1",
+                    "--stats", path], cwd=DIRECTORY, check=True, stdout=subprocess.DEVNULL)
+    with open(path) as f:
+        total = json.loads(f.readlines()[-1])
+    assert total["counters"]["decisions"] > 0
+    assert total["counters"]["rollouts"] > 0
+    assert total["counters"]["mcts_allocation"] == total["counters"]["decisions"]
@@ -0,0 +1,66 @@
+import random
+
+import bitboard
+import symmetry
+from transposition import TranspositionTable, new_entry
+
+
+def random_boards(seed, count):
+    rng = random.Random(seed)
+    for _ in range(count):
+        # random exponents with plenty of empty cells and equal neighbours, so most moves change the board
+        yield sum(rng.choice([0, 0, 0, 1, 1, 2, 3, rng.randint(1, 14)]) << (4 * k) for k in range(16))
+
+
+def test_move_map():
+    # move m on a board is move MOVE_MAP[t][m] on the transformed board, with the same score
+    for board in random_boards(0, 3000):
+        for t in range(8):
+            transformed = symmetry.transform(board, t)
+            for m in range(4):
+                after, score = bitboard.move(board, m)
+                transformed_after, transformed_score = bitboard.move(transformed, symmetry.MOVE_MAP[t][m])
+                assert symmetry.transform(after, t) == transformed_after
+                assert score == transformed_score
+
+
+def test_transforms():
+    for board in random_boards(1, 1000):
+        boards = {symmetry.transform(board, t) for t in range(8)}
+        for t in range(8):
+            assert symmetry.untransform(symmetry.transform(board, t), t) == board
+        key, t = symmetry.canonical(board)
+        assert key == min(boards)
+        assert symmetry.transform(board, t) == key
+        # every orientation of a board has the same canonical board
+        assert {symmetry.canonical(other)[0] for other in boards} == {key}
+
+
+def test_value_translation():
+    values = [1.0, 2.0, 3.0, 4.0]
+    for t in range(8):
+        canonical = symmetry.to_canonical(values, t)
+        assert sorted(canonical) == values
+        for m in range(4):
+            assert canonical[symmetry.MOVE_MAP[t][m]] == values[m]
+        assert symmetry.to_original(canonical, t) == values
+
+
+def test_canonical_table_round_trip():
+    # statistics stored in any orientation come back under the equivalent move in every other orientation
+    rng = random.Random(2)
+    for board in random_boards(3, 200):
+        for stored_t in range(8):
+            table = TranspositionTable(max_entries=16, canonical=True)
+            entry = new_entry()
+            for i in range(8):
+                entry[i] = rng.random()
+            stored = symmetry.transform(board, stored_t)
+            table.store(stored, entry)
+            assert len(table) == 1
+            for t in range(8):
+                read = table.get(symmetry.transform(stored, t))
+                for m in range(4):
+                    assert read[symmetry.MOVE_MAP[t][m]] == entry[m]
+                    assert read[4 + symmetry.MOVE_MAP[t][m]] == entry[4 + m]
+            assert list(table.get(stored)) == list(entry)
@@ -0,0 +1,53 @@
+import random
+
+import bitboard
+from newgame import Game
+from uct import UCTSearch, uct
+
+
+def test_tree_is_reused_after_a_move():
+    game = Game(gui=False, rng=random.Random(0))
+    search = UCTSearch(rng=random.Random(1))
+    search.set_root(game.board)
+    root = search.root
+
+    move = uct(game, 300, search, verbose=False)
+    # the new root is the node of the played move and of the tile that actually spawned, with its visits
+    chance = root.children[move]
+    assert chance.afterstate == bitboard.slide(root.board, move)[0]
+    node = chance.children[game.board]
+    assert search.root is node
+    assert node.board == game.board
+    visits = node.visits
+    assert visits > 0
+
+    # visits kept from the previous decision count towards the next one
+    search.run(visits)
+    assert search.root.visits == visits
+    search.run(visits + 10)
+    assert search.root.visits == visits + 10
+
+
+def test_unknown_spawn_starts_a_new_tree():
+    game = Game(gui=False, rng=random.Random(2))
+    search = UCTSearch(rng=random.Random(3))
+    search.set_root(game.board)
+    search.run(20)
+    move = search.best_move()
+    after = bitboard.slide(game.board, move)[0]
+    # a board no iteration sampled: a full row of new tiles cannot come from a single spawn
+    board = after | 0x1111
+    search.advance(move, board)
+    assert search.root.board == board
+    assert search.root.visits == 0
+
+
+def test_moves_are_legal():
+    rng = random.Random(4)
+    for _ in range(2):
+        game = Game(gui=False, rng=rng)
+        search = UCTSearch(rng=rng)
+        while not game.check_game_over():
+            legal = game.legal_moves()
+            move = uct(game, 10, search, verbose=False)
+            assert (legal >> move) & 1
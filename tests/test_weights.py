@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+import weights
+
+TUPLES = [(0, 1, 2, 3), (4, 5, 6, 7)]
+
+
+def random_table(seed=0):
+    return np.random.default_rng(seed).standard_normal(2 * 16 ** 4).astype("<f4")
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "w.bin")
+    table = random_table()
+    weights.write(path, TUPLES, table)
+    tuples, read = weights.read(path)
+    assert tuples == TUPLES
+    assert np.array_equal(read, table)
+    assert os.path.getsize(path) % weights.ALIGNMENT == 0
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_write_over_the_mapped_file(tmp_path):
+    # train --resume w.bin --out w.bin: the table being written is a memmap of the file it replaces
+    path = str(tmp_path / "w.bin")
+    weights.write(path, TUPLES, random_table())
+    tuples, table = weights.read(path, mode="c")
+    table[:10] += 1
+    expected = np.array(table)
+    weights.write(path, tuples, table)
+    del table
+    weights.verify(path)
+    assert np.array_equal(weights.read(path)[1], expected)
+
+
+def test_checksum_mismatch(tmp_path):
+    path = str(tmp_path / "w.bin")
+    weights.write(path, TUPLES, random_table())
+    with open(path, "r+b") as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b"\xff\xff\xff\xff")
+    with pytest.raises(ValueError, match="checksum"):
+        weights.verify(path)
+    # the table can still be mapped without the check
+    weights.read(path, verify=False)
+
+
+def test_rejects_other_files(tmp_path):
+    path = str(tmp_path / "w.bin")
+    with open(path, "wb") as f:
+        f.write(b"\0" * 64)
+    with pytest.raises(ValueError, match="not a weight file"):
+        weights.read(path)
+
+
+def test_rejects_a_truncated_table(tmp_path):
+    path = str(tmp_path / "w.bin")
+    weights.write(path, TUPLES, random_table())
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 4)
+    with pytest.raises(ValueError, match="truncated"):
+        weights.read(path)
@@ -0,0 +1,79 @@
+from array import array
+from collections import OrderedDict
+
+import symmetry
+
+# Bounded cache of search results keyed by the 64-bit bitboard.
+# Every entry holds, for each of the 4 moves, the summed value of the rollouts played after that move
+# and the number of rollouts, so later searches of the same position can start from these statistics.
+# The least recently used entry is evicted once the table is full.
+# With canonical=True the 8 symmetric versions of a board share one entry (see symmetry.py): entries are stored
+# for the canonical board and get()/store() translate the per-move statistics to and from the caller's orientation.
+
+# approximate memory of one entry (key, array of 8 doubles and the OrderedDict link), measured on CPython 3.11
+ENTRY_BYTES = 300
+
+
+def new_entry():
+    # [total of move 0..3, visits of move 0..3]
+    return array("d", [0.0] * 8)
+
+
+def _translate(entry, moves):
+    # entry[m] of the result is entry[moves[m]] of the argument, for both halves of the entry
+    return array("d", [entry[moves[m]] for m in range(4)] + [entry[4 + moves[m]] for m in range(4)])
+
+
+class TranspositionTable:
+    def __init__(self, max_bytes=64 * 2 ** 20, max_entries=None, canonical=False):
+        # the size is given either directly in entries or as a memory cap
+        self.max_entries = max_entries if max_entries is not None else max(1, max_bytes // ENTRY_BYTES)
+        self.canonical = canonical
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, board):
+        # in canonical mode the entry is a translated copy, so changes must be written back with store()
+        key, t = symmetry.canonical(board) if self.canonical else (board, symmetry.IDENTITY)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        if t != symmetry.IDENTITY:
+            entry = _translate(entry, symmetry.MOVE_MAP[t])
+        return entry
+
+    def store(self, board, entry):
+        key, t = symmetry.canonical(board) if self.canonical else (board, symmetry.IDENTITY)
+        if t != symmetry.IDENTITY:
+            # move m of the board is move MOVE_MAP[t][m] of the canonical board
+            canonical_entry = new_entry()
+            for m in range(4):
+                canonical_entry[symmetry.MOVE_MAP[t][m]] = entry[m]
+                canonical_entry[4 + symmetry.MOVE_MAP[t][m]] = entry[4 + m]
+            entry = canonical_entry
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,170 @@
+import math
+import random
+import time
+
+import bitboard
+
+# UCT (Monte Carlo tree search with UCB1) on bitboards.
+# The tree alternates decision nodes (a board where the player picks one of the 4 moves) and chance nodes
+# (the board right after a move, before the random tile appears). Every iteration walks down the tree with
+# UCB1 at decision nodes and a sampled tile spawn at chance nodes, adds one new chance node, plays a random
+# rollout from there and backs the score gained up the path.
+# After a move is played the subtree below the chosen move and the tile that actually spawned becomes the
+# new root, so the next decision starts from the statistics gathered so far.
+
+
+class DecisionNode:
+    __slots__ = ("board", "visits", "moves", "untried", "children")
+
+    def __init__(self, board, rng=random):
+        self.board = board
+        self.visits = 0
+        # move -> (board after the move, score gained) for the legal moves
+        self.moves = {}
+        for move in range(4):
+            after, score, changed = bitboard.slide(board, move)
+            if changed:
+                self.moves[move] = (after, score)
+        self.untried = list(self.moves)
+        rng.shuffle(self.untried)
+        # move -> ChanceNode
+        self.children = {}
+
+
+class ChanceNode:
+    __slots__ = ("afterstate", "reward", "visits", "total", "children")
+
+    def __init__(self, afterstate, reward):
+        self.afterstate = afterstate
+        self.reward = reward
+        self.visits = 0
+        self.total = 0
+        # board after the spawn -> DecisionNode
+        self.children = {}
+
+
+def random_rollout(board, rng=random):
+    # plays random moves until the game is over, returns the score gained
+    gained = 0
+    while not bitboard.is_game_over(board):
+        after, score, changed = bitboard.slide(board, rng.getrandbits(2))
+        if changed:
+            gained += score
+            board = bitboard.spawn(after, rng)
+    return gained
+
+
+class UCTSearch:
+    def __init__(self, exploration=math.sqrt(2), rng=None):
+        # rng: random.Random for the sampled spawns and the rollouts, the global random module by default
+        self.exploration = exploration
+        self.rng = rng if rng is not None else random
+        self.root = None
+        # largest return seen, used to bring the values into [0, 1] for UCB1
+        self.max_return = 1
+
+    def set_root(self, board):
+        # keeps the current tree if it already describes this board
+        if self.root is None or self.root.board != board:
+            self.root = DecisionNode(board, self.rng)
+
+    def advance(self, move, board):
+        # move was played and the game is now at board: keep the matching subtree as the new root
+        chance = self.root.children.get(move) if self.root is not None else None
+        node = chance.children.get(board) if chance is not None else None
+        self.root = node if node is not None else DecisionNode(board, self.rng)
+
+    def select(self, node):
+        log_visits = math.log(node.visits)
+        best, best_value = None, None
+        for child in node.children.values():
+            value = child.total / child.visits / self.max_return + \
+                self.exploration * math.sqrt(log_visits / child.visits)
+            if best_value is None or value > best_value:
+                best, best_value = child, value
+        return best
+
+    def iterate(self):
+        path = self.descend()
+        if path[-1].moves:
+            gained = random_rollout(self.expand(path), self.rng)
+        else:
+            # game over, nothing more to gain
+            gained = 0
+        self.backpropagate(path, gained)
+
+    def descend(self):
+        # selection: UCB1 at decision nodes and a sampled spawn at chance nodes, down to a decision node with
+        # untried moves or a finished game; returns the path from the root
+        node = self.root
+        path = [node]
+        while node.moves and not node.untried:
+            chance = self.select(node)
+            board = bitboard.spawn(chance.afterstate, self.rng)
+            node = chance.children.get(board)
+            if node is None:
+                node = DecisionNode(board, self.rng)
+                chance.children[board] = node
+            path += [chance, node]
+        return path
+
+    def expand(self, path):
+        # expansion: adds the chance node of an untried move of the last node and the decision node of a sampled
+        # spawn to the tree and the path, returns the board to roll out from
+        node = path[-1]
+        move = node.untried.pop()
+        after, score = node.moves[move]
+        chance = ChanceNode(after, score)
+        node.children[move] = chance
+        board = bitboard.spawn(after, self.rng)
+        leaf = DecisionNode(board, self.rng)
+        chance.children[board] = leaf
+        path += [chance, leaf]
+        return board
+
+    def backpropagate(self, path, gained):
+        # every chance node gets the score gained from its move to the end of the rollout
+        for node in reversed(path):
+            node.visits += 1
+            if isinstance(node, ChanceNode):
+                gained += node.reward
+                node.total += gained
+        self.max_return = max(self.max_return, gained)
+
+    def run(self, iterations, deadline=None):
+        # tops the root up to `iterations` visits, visits kept from earlier moves count;
+        # stops early once time.perf_counter() passes the deadline
+        for i in range(max(0, iterations - self.root.visits)):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self.iterate()
+
+    def best_move(self):
+        # the most visited move is the most robust choice, if nothing was searched yet any legal move will do
+        if not self.root.children:
+            return next(iter(self.root.moves), 0)
+        return max(self.root.children, key=lambda move: self.root.children[move].visits)
+
+    def move_values(self):
+        return [self.root.children[move].total / self.root.children[move].visits if move in self.root.children else 0
+                for move in range(4)]
+
+
+def uct(initial_game, iterations=200, search=None, verbose=True, time_limit=None):
+    # picks a move with UCT and plays it, like mcts(); pass the same search to every call to reuse the tree
+    # time_limit: optional budget in seconds, the most visited move so far is played when it runs out
+    if search is None:
+        search = UCTSearch()
+    search.set_root(initial_game.board)
+    search.run(iterations, None if time_limit is None else time.perf_counter() + time_limit)
+    best_move = search.best_move()
+
+    values = search.move_values()
+    initial_game.move(best_move)
+    search.advance(best_move, initial_game.board)
+    if verbose:
+        print(values)
+        print(str(initial_game))
+        print("Score: " + str(initial_game.score))
+        print()
+    return best_move
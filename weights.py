@@ -0,0 +1,88 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Binary weight file for n-tuple networks, loaded with numpy.memmap so that every worker process maps the same
+# page-cached copy of the weights instead of reading its own.
+#
+# Layout (little endian):
+#   magic         8 bytes  b"2048NTW\0"
+#   version       uint16
+#   tuple count   uint16
+#   entries       uint64   number of float32 weights in the table
+#   checksum      uint32   zlib.crc32 of the table bytes
+#   tuples        for every tuple: uint8 length, then one uint8 cell index (4 * row + column) per cell
+#   padding       zeros up to a multiple of 64 bytes
+#   table         entries x float32, the weights of every tuple one after the other
+
+MAGIC = b"2048NTW\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHQI")
+ALIGNMENT = 64
+
+
+def _header(tuples, entries, checksum):
+    data = HEADER.pack(MAGIC, VERSION, len(tuples), entries, checksum)
+    for cells in tuples:
+        data += struct.pack("<B", len(cells)) + bytes(cells)
+    return data + b"\0" * (-len(data) % ALIGNMENT)
+
+
+def write(path, tuples, table):
+    # the table is copied into memory first, it may be a memmap of the file being replaced (train --resume), and
+    # the weights go to a temporary file that only replaces path once it is complete
+    table = np.array(table, dtype="<f4")
+    temporary = path + ".tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(_header(tuples, len(table), zlib.crc32(table)))
+            f.write(table.tobytes())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def read_header(path):
+    # (tuples, number of weights, checksum, offset of the table in the file)
+    with open(path, "rb") as f:
+        fixed = f.read(HEADER.size)
+        if len(fixed) < HEADER.size:
+            raise ValueError(path + ": file too short for a weight file header")
+        magic, version, count, entries, checksum = HEADER.unpack(fixed)
+        if magic != MAGIC:
+            raise ValueError(path + ": not a weight file")
+        if version != VERSION:
+            raise ValueError(path + ": unsupported weight file version " + str(version))
+        tuples = []
+        for i in range(count):
+            length = f.read(1)
+            cells = f.read(length[0]) if length else b""
+            if not length or len(cells) < length[0]:
+                raise ValueError(path + ": truncated tuple layout")
+            tuples.append(tuple(cells))
+        offset = f.tell() + (-f.tell() % ALIGNMENT)
+    if entries != sum(16 ** len(cells) for cells in tuples):
+        raise ValueError(path + ": table size does not match the tuple layout")
+    return tuples, entries, checksum, offset
+
+
+def read(path, mode="r", verify=True):
+    # (tuples, table), the table is a numpy.memmap of the file: mode "r" is read-only and shared between processes,
+    # "c" is copy-on-write (pages are only copied once they are written to, e.g. to continue training)
+    # verify: compare the checksum, this reads the whole table once
+    tuples, entries, checksum, offset = read_header(path)
+    try:
+        table = np.memmap(path, dtype="<f4", mode=mode, offset=offset, shape=(entries,))
+    except ValueError:
+        raise ValueError(path + ": truncated weight table") from None
+    if verify and zlib.crc32(table) != checksum:
+        raise ValueError(path + ": checksum mismatch")
+    return tuples, table
+
+
+def verify(path):
+    read(path)